@@ -1,5 +1,4 @@
 """BAMLを使って問題文やJSON文字列をHand型に確実にパースするモジュール"""
-import json
 import logging
 import os
 
@@ -32,8 +31,8 @@ async def parse_hand_with_baml(hand_json: str) -> Hand:
     """
     try:
         # 直接JSONパース（BAMLを使わない）
-        hand_data = json.loads(hand_json)
-        return Hand(**hand_data)
+        # pydantic-coreがJSONから直接Handを構築する（中間のdictを作らない）
+        return Hand.model_validate_json(hand_json)
 
     except Exception as e:
         logger.error(f"JSON parsing failed: {str(e)}")
@@ -59,8 +58,8 @@ def parse_hand_with_baml_sync(hand_json: str) -> Hand:
     """
     try:
         # 直接JSONパース（BAMLを使わない）
-        hand_data = json.loads(hand_json)
-        return Hand(**hand_data)
+        # pydantic-coreがJSONから直接Handを構築する（中間のdictを作らない）
+        return Hand.model_validate_json(hand_json)
 
     except Exception as e:
         logger.error(f"JSON parsing failed: {str(e)}")
@@ -91,7 +90,7 @@ async def extract_hand_from_question(question: str) -> Hand:
             and len(hand.tiles) > 14
             and hand.tiles[-1] == hand.win_tile
         ):
-            logger.warning(f"Detected duplicate win_tile at end of tiles. Removing last tile. Before: {len(hand.tiles)} tiles")
+            logger.warning("Detected duplicate win_tile at end of tiles. Removing last tile. Before: %s tiles", len(hand.tiles))
             hand.tiles = hand.tiles[:-1]
 
         return hand
@@ -99,6 +98,6 @@ async def extract_hand_from_question(question: str) -> Hand:
     except Exception as e:
         # エラーメッセージを簡潔に（プロンプト全文は含めない）
         error_msg = str(e).split('\nPrompt:')[0]  # プロンプト以降を削除
-        logger.error(f"BAML extraction failed: {error_msg[:200]}")
+        logger.error("BAML extraction failed: %s", error_msg[:200])
         # 例外を投げずにNoneを返す（処理を続行）
         return None
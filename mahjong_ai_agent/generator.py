@@ -18,10 +18,9 @@ load_dotenv()
 
 
 # プロンプトテンプレート
+# 指示ごとに変わる部分は末尾に置き、共通の前半部分をプロンプトキャッシュに乗せる
 MAHJONG_QUESTION_PROMPT = """麻雀の点数計算問題の問題文を1問だけ生成してください。できるだけユニークで多様な状況を作成してください。
-
-**入力された指示に必ず従ってください:**
-{instruction}
+末尾に記載する指示に必ず従ってください。
 
 問題文には必ず以下の情報を含めてください：
 1. 場の状態（東場/南場、本場数、自風）
@@ -113,7 +112,10 @@ MAHJONG_QUESTION_PROMPT = """麻雀の点数計算問題の問題文を1問だ
 3. 例えば、手牌に「5z, 5z, 5z」があれば、和了牌として「5z」を選べます
 4. 手牌に存在しない牌を和了牌として指定しないでください
 
-問題文のみを出力してください。説明や構成の解説は不要です。"""
+問題文のみを出力してください。説明や構成の解説は不要です。
+
+**入力された指示に必ず従ってください:**
+{instruction}"""
 
 
 class MahjongQuestion(BaseModel):
@@ -129,13 +131,15 @@ class MahjongQuestion(BaseModel):
 class QuestionGenerator:
     """OpenAIを使って麻雀の点数計算問題を生成するクラス"""
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini", load_from: Optional[str] = None, enable_langfuse: bool = False):
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini", load_from: Optional[str] = None, enable_langfuse: bool = False, prompt_cache_key: Optional[str] = None, async_client: Optional[AsyncOpenAI] = None):
         """
         Args:
             api_key: OpenAI API key。Noneの場合は環境変数から取得
             model: 使用するモデル名
             load_from: 未使用（後方互換性のため残す）
             enable_langfuse: Langfuseトレーシングを有効にするか
+            prompt_cache_key: OpenAIのプロンプトキャッシュのキー。指定すると同じプロンプトのリクエストが同じキャッシュに振り分けられる
+            async_client: 共有するAsyncOpenAIクライアント。Noneの場合はここで作成
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
@@ -145,15 +149,16 @@ class QuestionGenerator:
 
         self.model = model
         self.enable_langfuse = enable_langfuse
+        self._request_options = {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else {}
 
         # Langfuseの設定
         if self.enable_langfuse:
             from langfuse.openai import openai
             self.client = openai.OpenAI(api_key=self.api_key)
-            self.async_client = openai.AsyncOpenAI(api_key=self.api_key)
+            self.async_client = async_client or openai.AsyncOpenAI(api_key=self.api_key)
         else:
             self.client = OpenAI(api_key=self.api_key)
-            self.async_client = AsyncOpenAI(api_key=self.api_key)
+            self.async_client = async_client or AsyncOpenAI(api_key=self.api_key)
 
     async def _generate_single_question(self, instruction: str) -> str:
         """単一の問題文を生成"""
@@ -169,7 +174,8 @@ class QuestionGenerator:
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
-                temperature=1.0
+                temperature=1.0,
+                **self._request_options
             )
         else:
             response = await self.async_client.chat.completions.create(
@@ -177,7 +183,8 @@ class QuestionGenerator:
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.8
+                temperature=0.8,
+                **self._request_options
             )
 
         return response.choices[0].message.content
@@ -198,14 +205,14 @@ class QuestionGenerator:
             list[MahjongQuestion]: 生成された問題のリスト
         """
         try:
-            # 指示を準備
-            instructions = []
-            for i in range(num_questions):
-                if not instruction:
-                    inst = f"バリエーション{i+1}として前の問題とは異なる牌の組み合わせと役を使用した問題を作成してください。"
-                else:
-                    inst = instruction
-                instructions.append(inst)
+            # 指示を準備（同じ指示ならリストの乗算でまとめて作る）
+            if instruction:
+                instructions = [instruction] * num_questions
+            else:
+                instructions = [
+                    f"バリエーション{i+1}として前の問題とは異なる牌の組み合わせと役を使用した問題を作成してください。"
+                    for i in range(num_questions)
+                ]
 
             # 並列で問題文を生成
             tasks = [self._generate_single_question(inst) for inst in instructions]
@@ -215,7 +222,7 @@ class QuestionGenerator:
             questions = []
             for i, result in enumerate(question_texts):
                 if isinstance(result, Exception):
-                    logger.error(f"Failed to generate question {i+1}: {result}")
+                    logger.error("Failed to generate question %s: %s", i + 1, result)
                     questions.append(MahjongQuestion(
                         generation_error=f"Generation failed: {str(result)}"
                     ))
@@ -270,7 +277,7 @@ class QuestionGenerator:
             for i, (result, inst) in enumerate(zip(question_texts, instructions)):
                 if isinstance(result, Exception):
                     error_msg = f"Generation failed: {str(result)}"
-                    logger.warning(f"Failed to generate question {i+1}/{len(instructions)}: {inst}")
+                    logger.warning("Failed to generate question %s/%s: %s", i + 1, len(instructions), inst)
                     questions.append(MahjongQuestion(
                         instruction=inst,
                         generation_error=error_msg
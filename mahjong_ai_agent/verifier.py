@@ -1,28 +1,246 @@
 import asyncio
-import json
+import hashlib
 import logging
 import os
-from typing import Optional
-
-from openai import OpenAI
+import re
+from typing import MutableMapping, Optional
+
+import openai
+import orjson
+from openai import AsyncOpenAI
+from pydantic import ValidationError
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 
 from mahjong_ai_agent.baml_parser import parse_hand_with_baml, extract_hand_from_question
-from tools.calculator import calculate_score, validate_hand
+from tools.calculator import calculate_score_async
 from baml.baml_client.types import Hand
 from tools.exceptions import HandValidationError, ScoreCalculationError
 
 logger = logging.getLogger(__name__)
 
+# LLM-as-a-Judgeの回答解析用（回答ごとにコンパイルしない）
+_ANSWER_PREFIX_RE = re.compile(r'^(?:回答形式|回答):?\s*')
+_STATUS_RE = re.compile(r'\b(yes|no)\b', re.IGNORECASE)
+
+
+def _instruction_key(instruction: str) -> bytes:
+    """指示のダイジェストを返す（同じ指示の候補間で使い回す）"""
+    return hashlib.blake2b(instruction.encode(), digest_size=16).digest()
+
+
+# LLM-as-a-Judgeのモデル
+_JUDGE_MODEL = "gpt-4o"  # より高性能なモデルに変更
+# プロンプトや回答形式を変えたら上げる（判定キャッシュのキーに含め、古い判定結果を使わないようにする）
+_JUDGE_PROMPT_VERSION = 2
+_JUDGE_CACHE_SALT = f"{_JUDGE_PROMPT_VERSION}:{_JUDGE_MODEL}".encode()
+
+
+def _judge_cache_key(instruction_key: bytes, verification_details: dict) -> tuple[bytes, bytes]:
+    """判定キャッシュのキー（指示のダイジェスト, 判定に使う計算結果のダイジェスト）を返す"""
+    result = orjson.dumps([verification_details.get(k) for k in ('score', 'han', 'fu', 'yaku')])
+    return instruction_key, hashlib.blake2b(_JUDGE_CACHE_SALT + result, digest_size=16).digest()
+
+
+# LLM-as-a-Judgeの回答のJSONスキーマ（Structured Outputsで形式を強制する）
+_COMPLIANCE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "compliance",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "compliant": {"type": "boolean"},
+                "reason": {"type": "string"},
+            },
+            "required": ["compliant", "reason"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+# LLM-as-a-Judgeのプロンプトテンプレート
+# 長い判定基準を固定の先頭部分にまとめ、指示と計算結果は末尾に置く
+# （OpenAIのプロンプトキャッシュが共通プレフィックスとして再利用できるようにするため）
+_COMPLIANCE_PROMPT_TEMPLATE = """生成された麻雀問題が指示に従っているかを評価してください。
+評価対象の指示と実際の結果は末尾に記載します。
+
+**重要: 役名の日本語・英語対応表**
+- Toitoi = 対々和
+- Tanyao = タンヤオ/断么九
+- Pinfu = ピンフ/平和
+- Iipeiko = イーペーコー/一盃口
+- Ryanpeikou = リャンペーコー/二盃口
+- Sanshoku = 三色同順
+- Sanshoku Dokou = 三色同刻
+- Ittsu = イッツー/一気通貫
+- Chiitoitsu = チートイツ/七対子
+- Honitsu = ホンイツ/混一色
+- Chinitsu = チンイツ/清一色
+- Honroutou = 混老頭
+- Chanta = チャンタ/混全帯么九
+- Junchan = ジュンチャン/純全帯么九
+- Yakuhai = 役牌 (haku=白, hatsu=発, chun=中, wind of place=自風, wind of round=場風)
+- Sanankou = サンアンコー/三暗刻
+- Sankantsu = サンカンツ/三槓子
+- Shousangen = ショウサンゲン/小三元
+- Dora = ドラ
+- Riichi = リーチ/立直
+- Ippatsu = イッパツ/一発
+- Rinshan kaihou = リンシャンカイホー/嶺上開花
+- Chankan = チャンカン/槍槓
+- Haitei raoyue = ハイテイ/海底摸月
+- Houtei raoyui = ホウテイ/河底撈魚
+- Double riichi = ダブルリーチ/ダブル立直
+- Tenhou = 天和
+- Chiihou = 地和
+
+判定基準:
+指示に明記されている条件のみをチェックしてください。指示に含まれていない条件（点数、翻数、符数など）は判定に含めないでください。
+
+例：
+- 指示が「難易度hardで、暗刻が三つある問題を作成してください」の場合
+  → 難易度がhardであること、暗刻が三つあること（役リストに「Sanankou」があるか）のみをチェック
+  → 点数や翻数、符数は指示に含まれていないため無視する
+
+- 指示が「タンヤオと三色同順で5200点の問題を作成してください」の場合
+  → 役リストに「Tanyao」と「Sanshoku」が含まれているか、点数が5200点であることをチェック
+  → 翻数や符数は指示に含まれていないため無視する
+
+- 指示が「対々和の問題を作成してください」の場合
+  → 役リストに「Toitoi」という文字列が含まれているかをチェック
+  → 点数や翻数、符数は指示に含まれていないため無視する
+
+**重要な注意事項:**
+- 役リストは配列形式で渡されます（例: ['Yakuhai (haku)', 'Toitoi', 'Dora']）
+- 配列の要素を一つずつ確認して、指定された役が含まれているか判定してください
+- 大文字小文字を区別せずに判定してください
+
+指示に明記されている全ての条件が満たされている場合のみ compliant を true、一つでも満たされていない場合は false にしてください。
+reason には判定の理由を簡潔に記載してください。
+
+指示: {instruction}
+
+実際の結果:
+- 計算された点数: {score}
+- 翻数: {han}
+- 符数: {fu}
+- 役: {yaku}"""
+
+
+def build_compliance_prompt(instruction: str, verification_details: dict) -> str:
+    """
+    指示適合性を判定するLLM-as-a-Judgeのプロンプトを作成する
+
+    Args:
+        instruction: 問題生成時の指示
+        verification_details: verify_with_detailsの返り値
+
+    Returns:
+        str: 判定用のプロンプト
+    """
+    return _COMPLIANCE_PROMPT_TEMPLATE.format_map({
+        'instruction': instruction,
+        'score': verification_details.get('score', 'N/A'),
+        'han': verification_details.get('han', 'N/A'),
+        'fu': verification_details.get('fu', 'N/A'),
+        'yaku': verification_details.get('yaku', []),
+    })
+
+
+def _format_judge_response(raw_response: Optional[str]) -> str:
+    """LLM-as-a-Judgeの回答を"Yes/No\n理由: ..."の形式に整形する"""
+    raw_response = (raw_response or "").strip()
+
+    # 通常はStructured OutputsのJSON（{"compliant": bool, "reason": str}）が返る
+    try:
+        data = orjson.loads(raw_response)
+    except orjson.JSONDecodeError:
+        data = None
+    if isinstance(data, dict) and isinstance(data.get('compliant'), bool):
+        status = "Yes" if data['compliant'] else "No"
+        reason = str(data.get('reason') or '').strip()
+        return f"{status}\n理由: {reason}" if reason else status
+
+    # JSONでない場合はテキストの回答として解析する（フォールバック）
+
+    # レスポンスをパースして、最初の行から「Yes」または「No」を正確に抽出
+    lines = [line.strip() for line in raw_response.split('\n') if line.strip()]
+    first_line = lines[0] if lines else ""
+
+    # 最初の行から「Yes」または「No」を抽出
+    # プレフィックス（「回答形式:」「回答形式」など）を除去
+    first_line_clean = _ANSWER_PREFIX_RE.sub('', first_line, count=1)
+
+    # 「Yes」または「No」を抽出（大文字小文字を区別しない、.upper()によるコピーは作らない）
+    # 最初の行に「Yes」または「No」がない場合、レスポンス全体から最初の出現を検索
+    match = _STATUS_RE.match(first_line_clean) or _STATUS_RE.search(raw_response)
+    if match:
+        status = "Yes" if match.group()[0] in "yY" else "No"
+    else:
+        # どちらも見つからない場合は、最初の行をそのまま使用（フォールバック）
+        status = first_line_clean or "Unknown"
+
+    reason = next(
+        (
+            line.split(':', 1)[-1].strip() if ':' in line else line.strip()
+            for line in lines[1:]
+            if '理由' in line or 'reason' in line.lower()
+        ),
+        "",
+    )
+    # 理由が見つからない場合は、2行目以降をすべて理由として使用
+    if not reason and len(lines) > 1:
+        reason = '\n'.join(lines[1:]).strip()
+
+    return f"{status}\n理由: {reason}" if reason else status
+
 
 class QuestionVerifier:
     """麻雀の問題と回答が正しいかをチェックするクラス（BAML統合版）"""
 
-    def __init__(self, use_baml: bool = True):
+    def __init__(
+        self,
+        use_baml: bool = True,
+        async_client: Optional[AsyncOpenAI] = None,
+        judge_cache: Optional[MutableMapping[tuple[bytes, bytes], str]] = None,
+        max_concurrency: Optional[int] = None,
+        prompt_cache_key: Optional[str] = None,
+    ):
         """
         Args:
             use_baml: BAMLでJSON→Hand型変換を行うか（デフォルト: True）
+            async_client: LLM-as-a-Judgeで使うAsyncOpenAIクライアント。Noneの場合は初回判定時に作成
+            judge_cache: LLM-as-a-Judgeの判定結果のキャッシュ。Noneの場合はインスタンス内のdictを使用
+            max_concurrency: LLM-as-a-Judgeの同時リクエスト数の上限。Noneの場合は制限しない
+            prompt_cache_key: OpenAIのプロンプトキャッシュのキー（オプション）
         """
         self.use_baml = use_baml
+        self._async_client = async_client
+        self._judge_client: Optional[AsyncOpenAI] = None
+        self._judge_cache = {} if judge_cache is None else judge_cache
+        # APIのレート制限に収まるよう、並列に投げる判定リクエスト数を制限する
+        self._judge_semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._request_options = {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else {}
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        """判定用のクライアントを返す（接続プールを使い回すため1つだけ作成する）"""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._async_client
+
+    def _get_judge_client(self) -> AsyncOpenAI:
+        """判定リクエスト用のクライアントを返す（リトライは_request_judgeで行うため、SDK側のリトライは無効にする）"""
+        if self._judge_client is None:
+            self._judge_client = self._get_async_client().with_options(max_retries=0)
+        return self._judge_client
 
     async def verify_question(
         self, hand_json: str, expected_score: Optional[int] = None
@@ -46,18 +264,14 @@ class QuestionVerifier:
             if self.use_baml:
                 hand = await parse_hand_with_baml(hand_json)
             else:
-                hand_data = json.loads(hand_json)
-                hand = Hand(**hand_data)
+                hand = Hand.model_validate_json(hand_json)
 
-            # 手牌の検証
-            validate_hand(hand)
-
-            # 点数計算
-            result = calculate_score(hand)
+            # 手牌の検証と点数計算（CPU処理のためイベントループを塞がないようスレッドで実行）
+            result = await calculate_score_async(hand)
 
             # エラーがある場合は0を返す
             if result.error:
-                logger.error(f"Score calculation error: {result.error}")
+                logger.error("Score calculation error: %s", result.error)
                 return 0
 
             # 期待される点数が指定されている場合、一致するかチェック
@@ -75,7 +289,7 @@ class QuestionVerifier:
         except ScoreCalculationError as e:
             logger.error(f"Score calculation error: {str(e)}")
             return 0
-        except json.JSONDecodeError as e:
+        except (orjson.JSONDecodeError, ValidationError) as e:
             logger.error(f"JSON parse error: {str(e)}")
             return 0
         except Exception as e:
@@ -83,13 +297,13 @@ class QuestionVerifier:
             return 0
 
     async def verify_with_details(
-        self, hand_json: str, expected_score: Optional[int] = None
+        self, hand_json: str | Hand, expected_score: Optional[int] = None
     ) -> dict:
         """
         麻雀の問題の回答が正しいかチェックし、詳細情報を返す（非同期版 + BAML統合）
 
         Args:
-            hand_json: Hand形式のJSON文字列
+            hand_json: Hand形式のJSON文字列、またはパース済みのHandオブジェクト
             expected_score: 期待される点数（オプション）
 
         Returns:
@@ -102,18 +316,17 @@ class QuestionVerifier:
                 - error: エラーメッセージ（エラーがある場合）
         """
         try:
+            # Handオブジェクトが渡された場合はシリアライズ・パースし直さずにそのまま使う
+            if isinstance(hand_json, Hand):
+                hand = hand_json
             # BAMLでJSONをパース
-            if self.use_baml:
+            elif self.use_baml:
                 hand = await parse_hand_with_baml(hand_json)
             else:
-                hand_data = json.loads(hand_json)
-                hand = Hand(**hand_data)
-
-            # 手牌の検証
-            validate_hand(hand)
+                hand = Hand.model_validate_json(hand_json)
 
-            # 点数計算
-            result = calculate_score(hand)
+            # 手牌の検証と点数計算（CPU処理のためイベントループを塞がないようスレッドで実行）
+            result = await calculate_score_async(hand)
 
             # エラーがある場合
             if result.error:
@@ -143,7 +356,7 @@ class QuestionVerifier:
 
             return response
 
-        except (HandValidationError, ScoreCalculationError, json.JSONDecodeError) as e:
+        except (HandValidationError, ScoreCalculationError, orjson.JSONDecodeError, ValidationError) as e:
             return {
                 "is_valid": 0,
                 "error": str(e),
@@ -156,13 +369,13 @@ class QuestionVerifier:
             }
 
     async def verify_batch(
-        self, hand_jsons: list[str], expected_scores: Optional[list[Optional[int]]] = None
+        self, hand_jsons: list[str | Hand], expected_scores: Optional[list[Optional[int]]] = None
     ) -> list[dict]:
         """
         複数の麻雀問題を並列で検証する（非同期版 + BAML統合）
 
         Args:
-            hand_jsons: Hand形式のJSON文字列のリスト
+            hand_jsons: Hand形式のJSON文字列、またはパース済みのHandオブジェクトのリスト
             expected_scores: 期待される点数のリスト（オプション）
 
         Returns:
@@ -179,7 +392,7 @@ class QuestionVerifier:
             result = await self.verify_with_details(hand_jsons[0], expected_scores[0])
             return [result]
 
-        logger.info(f"Verifying {len(hand_jsons)} questions in parallel...")
+        logger.info("Verifying %s questions in parallel...", len(hand_jsons))
 
         # 非同期タスクを並列実行
         tasks = [
@@ -193,7 +406,7 @@ class QuestionVerifier:
         processed_results = []
         for i, result in enumerate(results):
             if isinstance(result, Exception):
-                logger.error(f"Error verifying question at index {i}: {str(result)}", exc_info=result)
+                logger.error("Error verifying question at index %s: %s", i, result, exc_info=result)
                 processed_results.append({
                     "is_verified": 0,
                     "error": f"Verification failed: {str(result)}",
@@ -204,7 +417,8 @@ class QuestionVerifier:
         return processed_results
 
     async def verify_from_question(
-        self, question: str, instruction: Optional[str] = None, expected_score: Optional[int] = None
+        self, question: str, instruction: Optional[str] = None, expected_score: Optional[int] = None,
+        instruction_key: Optional[bytes] = None
     ) -> dict:
         """
         問題文から検証まで一貫して処理する（BAML→Python→LLM-as-a-Judge）
@@ -213,6 +427,7 @@ class QuestionVerifier:
             question: 問題文（自然言語）
             instruction: 問題生成時の指示（LLM-as-a-Judgeで使用）
             expected_score: 期待される点数（オプション）
+            instruction_key: 指示のダイジェスト（オプション）。判定キャッシュのキーに使用
         
         Returns:
             dict: 検証結果の詳細
@@ -254,18 +469,9 @@ class QuestionVerifier:
         
         # Step 2: Python - 点数計算、役の特定、飜数、符数の計算
         try:
-            # BAMLでJSONをパース
-            if self.use_baml:
-                hand_obj = await parse_hand_with_baml(hand_json)
-            else:
-                hand_data = json.loads(hand_json)
-                hand_obj = Hand(**hand_data)
-            
-            # 手牌の検証
-            validate_hand(hand_obj)
-            
-            # 点数計算
-            calc_result = calculate_score(hand_obj)
+            # Step 1で抽出したHandをそのまま使う（hand_jsonからの再パースは不要）
+            # 手牌の検証と点数計算（CPU処理のためイベントループを塞がないようスレッドで実行）
+            calc_result = await calculate_score_async(hand)
             
             if calc_result.error:
                 result['calculation_success'] = False
@@ -285,7 +491,7 @@ class QuestionVerifier:
             else:
                 result['is_verified'] = 1
                 
-        except (HandValidationError, ScoreCalculationError, json.JSONDecodeError) as e:
+        except (HandValidationError, ScoreCalculationError, orjson.JSONDecodeError, ValidationError) as e:
             result['calculation_success'] = False
             result['calculation_error'] = str(e)
             return result
@@ -295,6 +501,7 @@ class QuestionVerifier:
             return result
         
         # Step 3: LLM-as-a-Judge - 指示適合性を判定
+        # 役の無い手牌は点数計算の時点で失敗扱いになるため、計算成功なら判定する
         if instruction and result['calculation_success']:
             try:
                 verification_details = {
@@ -303,7 +510,9 @@ class QuestionVerifier:
                     'score': result.get('score'),
                     'yaku': result.get('yaku', [])
                 }
-                compliance_result = await self.judge_instruction_compliance(instruction, verification_details)
+                compliance_result = await self.judge_instruction_compliance(
+                    instruction, verification_details, instruction_key
+                )
                 result['compliance_judged'] = True
                 result['compliance_result'] = compliance_result
             except Exception as e:
@@ -335,14 +544,21 @@ class QuestionVerifier:
         if len(questions) != len(instructions) or len(questions) != len(expected_scores):
             raise ValueError("questions, instructions, and expected_scores must have the same length")
         
+        # 指示のダイジェストは指示ごとに1回だけ計算する
+        instruction_keys = {
+            instruction: _instruction_key(instruction) for instruction in set(instructions) if instruction
+        }
+
         # 1つのみの場合は並列化不要
         if len(questions) == 1:
-            result = await self.verify_from_question(questions[0], instructions[0], expected_scores[0])
+            result = await self.verify_from_question(
+                questions[0], instructions[0], expected_scores[0], instruction_keys.get(instructions[0])
+            )
             return [result]
 
         # 非同期タスクを並列実行
         tasks = [
-            self.verify_from_question(question, instruction, expected_score)
+            self.verify_from_question(question, instruction, expected_score, instruction_keys.get(instruction))
             for question, instruction, expected_score in zip(questions, instructions, expected_scores)
         ]
         
@@ -352,7 +568,7 @@ class QuestionVerifier:
         processed_results = []
         for i, result in enumerate(results):
             if isinstance(result, Exception):
-                logger.error(f"Error verifying question at index {i}: {str(result)}", exc_info=result)
+                logger.error("Error verifying question at index %s: %s", i, result, exc_info=result)
                 processed_results.append({
                     "baml_extracted": False,
                     "baml_error": f"Exception: {str(result)}",
@@ -365,8 +581,49 @@ class QuestionVerifier:
 
         return processed_results
 
+    def _judge_request_body(self, prompt: str) -> dict:
+        """LLM-as-a-Judgeのリクエストのパラメータ（通常のAPIとBatch APIで共通）"""
+        return {
+            "model": _JUDGE_MODEL,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.0,
+            "response_format": _COMPLIANCE_RESPONSE_FORMAT,
+            **self._request_options,
+        }
+
+    # レート制限や一時的な接続エラーは、そのリクエストだけを待って再試行する（他の並列判定は止めない）
+    @retry(
+        retry=retry_if_exception_type(
+            (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+        ),
+        wait=wait_exponential_jitter(initial=1, max=30),
+        stop=stop_after_attempt(5),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
+    async def _request_judge(self, prompt: str):
+        """LLM-as-a-Judgeのリクエストを送信する"""
+        # 同時リクエスト数の枠は1回の試行の間だけ確保し、再試行の待ち時間には他の判定に譲る
+        if self._judge_semaphore is None:
+            return await self._get_judge_client().chat.completions.create(
+                **self._judge_request_body(prompt)
+            )
+        async with self._judge_semaphore:
+            return await self._get_judge_client().chat.completions.create(
+                **self._judge_request_body(prompt)
+            )
+
+    def _store_judge_result(self, cache_key: tuple[bytes, bytes], raw_response: Optional[str]) -> str:
+        """回答を整形し、Yes/Noが判定できた場合のみキャッシュする"""
+        formatted = _format_judge_response(raw_response)
+        if formatted.split('\n', 1)[0] in ("Yes", "No"):
+            self._judge_cache[cache_key] = formatted
+        return formatted
+
     async def judge_instruction_compliance(
-        self, instruction: str, verification_details: dict
+        self, instruction: str, verification_details: dict, instruction_key: Optional[bytes] = None
     ) -> str:
         """
         指示に従って問題が生成されているかを判定する
@@ -374,154 +631,120 @@ class QuestionVerifier:
         Args:
             instruction: 問題生成時の指示
             verification_details: verify_with_detailsの返り値
+            instruction_key: 指示のダイジェスト（オプション）。Noneの場合はここで計算する
 
         Returns:
             str: 判定結果（"Yes/No\n理由: ..."の形式）
         """
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        yaku_list = verification_details.get('yaku', [])
-        prompt = f"""生成された麻雀問題が指示に従っているかを評価してください。
-
-指示: {instruction}
-
-実際の結果:
-- 計算された点数: {verification_details.get('score', 'N/A')}
-- 翻数: {verification_details.get('han', 'N/A')}
-- 符数: {verification_details.get('fu', 'N/A')}
-- 役: {yaku_list}
-
-**重要: 役名の日本語・英語対応表**
-- Toitoi = 対々和
-- Tanyao = タンヤオ/断么九
-- Pinfu = ピンフ/平和
-- Iipeiko = イーペーコー/一盃口
-- Ryanpeikou = リャンペーコー/二盃口
-- Sanshoku = 三色同順
-- Sanshoku Dokou = 三色同刻
-- Ittsu = イッツー/一気通貫
-- Chiitoitsu = チートイツ/七対子
-- Honitsu = ホンイツ/混一色
-- Chinitsu = チンイツ/清一色
-- Honroutou = 混老頭
-- Chanta = チャンタ/混全帯么九
-- Junchan = ジュンチャン/純全帯么九
-- Yakuhai = 役牌 (haku=白, hatsu=発, chun=中, wind of place=自風, wind of round=場風)
-- Sanankou = サンアンコー/三暗刻
-- Sankantsu = サンカンツ/三槓子
-- Shousangen = ショウサンゲン/小三元
-- Dora = ドラ
-- Riichi = リーチ/立直
-- Ippatsu = イッパツ/一発
-- Rinshan kaihou = リンシャンカイホー/嶺上開花
-- Chankan = チャンカン/槍槓
-- Haitei raoyue = ハイテイ/海底摸月
-- Houtei raoyui = ホウテイ/河底撈魚
-- Double riichi = ダブルリーチ/ダブル立直
-- Tenhou = 天和
-- Chiihou = 地和
-
-判定基準:
-指示に明記されている条件のみをチェックしてください。指示に含まれていない条件（点数、翻数、符数など）は判定に含めないでください。
-
-例：
-- 指示が「難易度hardで、暗刻が三つある問題を作成してください」の場合
-  → 難易度がhardであること、暗刻が三つあること（役リストに「Sanankou」があるか）のみをチェック
-  → 点数や翻数、符数は指示に含まれていないため無視する
-
-- 指示が「タンヤオと三色同順で5200点の問題を作成してください」の場合
-  → 役リストに「Tanyao」と「Sanshoku」が含まれているか、点数が5200点であることをチェック
-  → 翻数や符数は指示に含まれていないため無視する
-
-- 指示が「対々和の問題を作成してください」の場合
-  → 役リストに「Toitoi」という文字列が含まれているかをチェック
-  → 点数や翻数、符数は指示に含まれていないため無視する
-
-**重要な注意事項:**
-- 役リストは配列形式で渡されます（例: ['Yakuhai (haku)', 'Toitoi', 'Dora']）
-- 配列の要素を一つずつ確認して、指定された役が含まれているか判定してください
-- 大文字小文字を区別せずに判定してください
-
-指示に明記されている全ての条件が満たされている場合のみ「Yes」、一つでも満たされていない場合は「No」と回答してください。
-理由も簡潔に説明してください。
-
-**重要: 回答形式を厳密に守ってください**
-回答は必ず以下の形式で出力してください。最初の行には「Yes」または「No」という単語のみを出力してください（「回答形式:」などのプレフィックスは不要です）。2行目以降に理由を記載してください。
-
-回答形式:
-Yes
-理由: （簡潔な説明）
-
-または
-
-No
-理由: （簡潔な説明）
+        # 同じ指示・同じ計算結果ならプロンプトも同一になるため、判定結果を再利用する
+        if instruction_key is None:
+            instruction_key = _instruction_key(instruction)
+        cache_key = _judge_cache_key(instruction_key, verification_details)
+        cached = self._judge_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        prompt = build_compliance_prompt(instruction, verification_details)
+
+        response = await self._request_judge(prompt)
+        return self._store_judge_result(cache_key, response.choices[0].message.content)
+
+    async def judge_batch_with_batch_api(
+        self, items: list[tuple[str, dict]], poll_interval: float = 30.0,
+        max_poll_interval: float = 600.0
+    ) -> list[str]:
+        """
+        OpenAIのBatch APIで指示適合性をまとめて判定する（コスト半額、完了まで最大24時間）
 
-**注意: 最初の行には「Yes」または「No」という単語のみを出力してください。他の文字列（「回答形式:」など）は含めないでください。**"""
+        Args:
+            items: (問題生成時の指示, verify_with_detailsの返り値) のリスト
+            poll_interval: バッチの状態を確認する最初の間隔（秒）
+            max_poll_interval: 状態確認の間隔の上限（秒）
 
-        response = client.chat.completions.create(
-            model="gpt-4o",  # より高性能なモデルに変更
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.0
+        Returns:
+            list[str]: itemsと同じ順の判定結果（"Yes/No\n理由: ..."の形式）
+        """
+        results: list[Optional[str]] = [None] * len(items)
+        # キャッシュに無いものだけを、同じプロンプトは1件にまとめて投げる
+        pending: dict[tuple[bytes, bytes], list[int]] = {}
+        prompts: dict[tuple[bytes, bytes], str] = {}
+        instruction_keys: dict[str, bytes] = {}
+        for i, (instruction, details) in enumerate(items):
+            if instruction not in instruction_keys:
+                instruction_keys[instruction] = _instruction_key(instruction)
+            cache_key = _judge_cache_key(instruction_keys[instruction], details)
+            cached = self._judge_cache.get(cache_key)
+            if cached is not None:
+                results[i] = cached
+                continue
+            if cache_key not in pending:
+                prompts[cache_key] = build_compliance_prompt(instruction, details)
+            pending.setdefault(cache_key, []).append(i)
+
+        if pending:
+            keys = list(pending)
+            raw_responses = await self._run_judge_batch([prompts[k] for k in keys], poll_interval, max_poll_interval)
+            # Batch APIで結果が得られなかったものは通常のAPIで並列に判定する
+            missing = [cache_key for n, cache_key in enumerate(keys) if n not in raw_responses]
+            fallback_items = [items[pending[k][0]] for k in missing]
+            fallback = await asyncio.gather(*(
+                self.judge_instruction_compliance(instruction, details, instruction_keys[instruction])
+                for instruction, details in fallback_items
+            ))
+            formatted_by_key = dict(zip(missing, fallback))
+            for n, cache_key in enumerate(keys):
+                if n in raw_responses:
+                    formatted_by_key[cache_key] = self._store_judge_result(cache_key, raw_responses[n])
+                for i in pending[cache_key]:
+                    results[i] = formatted_by_key[cache_key]
+        return results
+
+    async def _run_judge_batch(
+        self, prompts: list[str], poll_interval: float, max_poll_interval: float
+    ) -> dict[int, str]:
+        """プロンプトをBatch APIに投入し、完了を待って {プロンプトの番号: 回答} を返す"""
+        client = self._get_async_client()
+        lines = b"".join(
+            orjson.dumps({
+                "custom_id": str(n),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._judge_request_body(prompt),
+            }) + b"\n"
+            for n, prompt in enumerate(prompts)
         )
-
-        raw_response = response.choices[0].message.content.strip()
-
-        # レスポンスをパースして、最初の行から「Yes」または「No」を正確に抽出
-        lines = [line.strip() for line in raw_response.split('\n') if line.strip()]
-        first_line = lines[0] if lines else ""
-
-        # 最初の行から「Yes」または「No」を抽出
-        # プレフィックス（「回答形式:」「回答形式」など）を除去
-        first_line_clean = first_line
-        for prefix in ['回答形式:', '回答形式', '回答:', '回答']:
-            if first_line_clean.startswith(prefix):
-                first_line_clean = first_line_clean[len(prefix):].strip()
-                break
-
-        # 「Yes」または「No」を抽出（大文字小文字を区別しない）
-        first_line_upper = first_line_clean.upper()
-        if first_line_upper.startswith('YES'):
-            status = "Yes"
-        elif first_line_upper.startswith('NO'):
-            status = "No"
-        else:
-            # 最初の行に「Yes」または「No」がない場合、レスポンス全体から検索
-            response_upper = raw_response.upper()
-            # プレフィックスを除去
-            response_clean = raw_response
-            for prefix in ['回答形式:', '回答形式', '回答:', '回答']:
-                response_clean = response_clean.replace(prefix, '').strip()
-
-            response_clean_upper = response_clean.upper()
-            # 「Yes」と「No」の最初の出現位置を確認
-            yes_pos = response_clean_upper.find("YES")
-            no_pos = response_clean_upper.find("NO")
-
-            if yes_pos != -1 and (no_pos == -1 or yes_pos < no_pos):
-                status = "Yes"
-            elif no_pos != -1:
-                status = "No"
-            else:
-                # どちらも見つからない場合は、最初の行をそのまま使用（フォールバック）
-                status = first_line_clean or "Unknown"
-
-        reason = next(
-            (
-                line.split(':', 1)[-1].strip() if ':' in line else line.strip()
-                for line in lines[1:]
-                if '理由' in line or 'reason' in line.lower()
-            ),
-            "",
+        input_file = await client.files.create(file=("compliance.jsonl", lines), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
         )
-        # 理由が見つからない場合は、2行目以降をすべて理由として使用
-        if not reason and len(lines) > 1:
-            reason = '\n'.join(lines[1:]).strip()
-
-        # フォーマットされたレスポンスを返す
-        return f"{status}\n理由: {reason}" if reason else status
+        logger.info(f"Submitted {len(prompts)} compliance judgments as batch {batch.id}")
+
+        # 完了するまで間隔を伸ばしながらポーリングする
+        interval = poll_interval
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, max_poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+            logger.debug(f"Batch {batch.id} status: {batch.status}")
+
+        if batch.status != "completed":
+            logger.warning(f"Batch {batch.id} ended with status {batch.status}")
+        if not batch.output_file_id:
+            return {}
+
+        output = await client.files.content(batch.output_file_id)
+        raw_responses = {}
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            raw_responses[int(record["custom_id"])] = response["body"]["choices"][0]["message"]["content"]
+        return raw_responses
 
 
 if __name__ == "__main__":
@@ -553,7 +776,7 @@ if __name__ == "__main__":
         }
 
         verifier = QuestionVerifier()
-        hand_json = json.dumps(test_hand)
+        hand_json = orjson.dumps(test_hand).decode()
 
         # シンプルな検証
         result = await verifier.verify_question(hand_json)
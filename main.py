@@ -1,14 +1,17 @@
 import argparse
 import asyncio
+import contextlib
 import csv
-import json
+import functools
+import hashlib
 import logging
+import os
 import random
+import sys
 from pathlib import Path
 from datetime import datetime
 
-from mahjong_ai_agent.generator import QuestionGenerator
-from mahjong_ai_agent.verifier import QuestionVerifier
+import orjson
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -16,13 +19,191 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def generate_command_async(args):
-    """問題生成コマンド（非同期版）"""
-    generator = QuestionGenerator(
-        model=args.model,
-        enable_langfuse=args.langfuse if hasattr(args, 'langfuse') else False
-    )
+def _write_atomic(path, data: bytes) -> None:
+    """一時ファイルに書き出してから置き換え、途中で中断されても壊れたファイルを残さない"""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _dump(path, data) -> None:
+    """結果をインデント付きUTF-8のJSONとしてファイルに書き出す"""
+    _write_atomic(path, orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+class _JsonArrayWriter:
+    """{..., "<key>": [record, ...]} 形式のJSONを1件ずつ書き出す（全件をメモリに保持しない）"""
+
+    def __init__(self, path, header: dict, key: str):
+        self.path = Path(path)
+        # 書き終えるまでは一時ファイルに書き、close時に置き換える
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._f = open(self._tmp, "wb")
+        self._f.write(b"{\n")
+        for k, v in header.items():
+            self._f.write(b"  " + orjson.dumps(k) + b": " + orjson.dumps(v) + b",\n")
+        self._f.write(b"  " + orjson.dumps(key) + b": [")
+        self._sep = b"\n    "
+        self._count = 0
+
+    def write(self, record: dict) -> None:
+        self._f.write(self._sep + orjson.dumps(record))
+        self._sep = b",\n    "
+        self._count += 1
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self._f.write(b"\n  ]\n}\n")
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def __enter__(self) -> "_JsonArrayWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # 1件も書き出す前に失敗した場合は一時ファイルを捨て、既存のファイルを空の結果で上書きしない
+        if exc_type is not None and self._count == 0:
+            self._f.close()
+            self._tmp.unlink(missing_ok=True)
+            return
+        # 途中で例外や中断があっても、書き出し済みのレコードで配列を閉じて保存する
+        self.close()
+
+
+@functools.lru_cache(maxsize=None)
+def _dist_dir() -> Path:
+    """デフォルトの出力先ディレクトリを返す（作成は最初の1回だけ行う）"""
+    dist = Path("dist")
+    dist.mkdir(exist_ok=True)
+    return dist
+
+
+def _run_timestamp() -> str:
+    """現在時刻のタイムスタンプを返す（コマンドの開始時に1回だけ呼び、書き出すファイルの名前をそろえる）"""
+    return f"{datetime.now():%Y%m%d_%H%M%S}"
+
+
+def _default_output_path(prefix: str, timestamp: str) -> Path:
+    """デフォルトの出力パス（dist/{prefix}_{timestamp}.json）を返す"""
+    return _dist_dir() / f"{prefix}_{timestamp}.json"
+
+
+# --prompt-cache指定時にOpenAIへ渡すプロンプトキャッシュのキー
+_GENERATOR_PROMPT_CACHE_KEY = "mahjong-question-generation"
+_JUDGE_PROMPT_CACHE_KEY = "mahjong-instruction-compliance"
+
+
+def _create_openai_client(enable_langfuse: bool = False):
+    """問題生成と指示適合性判定で共有するAsyncOpenAIクライアントを生成する"""
+    if enable_langfuse:
+        from langfuse.openai import openai
+        return openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+# 検証結果・判定結果のキャッシュの保存先（CLI実行をまたいで再利用する）
+_CACHE_DIR = Path("dist") / ".cache"
+
 
+@functools.lru_cache(maxsize=None)
+def _get_cache(name: str, persistent: bool = True):
+    """名前ごとのキャッシュを返す（persistent=Falseの場合はプロセス内のdict）"""
+    if not persistent:
+        return {}
+    from diskcache import Cache
+
+    return Cache(str(_CACHE_DIR / name))
+
+
+@contextlib.asynccontextmanager
+async def _command_components(args):
+    """コマンドの実行中だけ使う (QuestionGenerator, QuestionVerifier) を生成する
+
+    クライアントの接続プールやSemaphoreは実行中のイベントループに紐づくため、
+    モジュール単位では使い回さず、コマンドの実行ごとにループ内で作成して終了時に閉じる。
+    """
+    # OpenAI/BAMLクライアントの読み込みは重いため、実際に使うコマンドでのみimportする
+    from mahjong_ai_agent.generator import QuestionGenerator
+    from mahjong_ai_agent.verifier import QuestionVerifier
+
+    enable_langfuse = getattr(args, 'langfuse', False)
+    prompt_cache = getattr(args, 'prompt_cache', False)
+    client = _create_openai_client(enable_langfuse)
+    try:
+        generator = QuestionGenerator(
+            model=args.model,
+            enable_langfuse=enable_langfuse,
+            prompt_cache_key=_GENERATOR_PROMPT_CACHE_KEY if prompt_cache else None,
+            async_client=client,
+        )
+        verifier = QuestionVerifier(
+            use_baml=True,
+            async_client=client,
+            judge_cache=_get_cache("judge", not getattr(args, 'no_cache', False)),
+            max_concurrency=getattr(args, 'concurrency', None),
+            prompt_cache_key=_JUDGE_PROMPT_CACHE_KEY if prompt_cache else None,
+        )
+        yield generator, verifier
+    finally:
+        await client.close()
+
+
+# --batch-api指定時、Batch APIを使う判定件数の下限（これ未満なら通常のAPIで並列に判定する）
+_BATCH_API_THRESHOLD = 50
+
+
+# 検証結果のキャッシュのキー: 検証ロジックのバージョン・手牌JSON・期待点数のハッシュ
+# 点数計算は決定的なので、同じ手牌は一度だけ検証すればよい
+# hand_jsonはmodel_dump_json()の出力でキー順が固定なので、パースし直して正規化しない
+def _validate_cache_key(hand_json: str, expected_score, version: int) -> bytes:
+    return hashlib.blake2b(
+        f"{version}:".encode() + hand_json.encode() + str(expected_score).encode(), digest_size=16
+    ).digest()
+
+
+async def _verify_batch_cached(
+    verifier, hand_jsons: list[str], expected_scores: list, use_cache: bool = True, hands: list | None = None
+) -> list[dict]:
+    """キャッシュに無い手牌だけをverify_batchで検証する
+
+    handsにHandオブジェクトを渡した場合、hand_jsonsはキャッシュのキーにだけ使い、
+    検証はHandオブジェクトのまま行う（JSONのパースし直しを省く）
+    """
+    from tools.calculator import VALIDATION_VERSION
+
+    targets = hand_jsons if hands is None else hands
+    cache = _get_cache("validate", use_cache)
+    keys = [_validate_cache_key(h, s, VALIDATION_VERSION) for h, s in zip(hand_jsons, expected_scores)]
+    results = [cache.get(k) for k in keys]
+    # 同じバッチ内で重複する手牌は最初の1つだけを検証する
+    miss: dict[bytes, int] = {}
+    for i, (key, details) in enumerate(zip(keys, results)):
+        if details is None:
+            miss.setdefault(key, i)
+    if miss:
+        miss_idx = list(miss.values())
+        details_list = await verifier.verify_batch(
+            [targets[i] for i in miss_idx], [expected_scores[i] for i in miss_idx]
+        )
+        verified = dict(zip(miss, details_list))
+        for key, details in verified.items():
+            # エラー・例外の結果は一時的な失敗の可能性があるため保存しない
+            if 'error' not in details:
+                cache[key] = details
+        results = [verified.get(k, details) for k, details in zip(keys, results)]
+    return results
+
+
+async def generate_command_async(args, generator, verifier):
+    """問題生成コマンド（非同期版）
+
+    生成した問題を検証し、(インデックス, 問題, hand_json, 検証結果, 指示適合性の判定結果) を
+    結果が揃った順にyieldする。指示適合性の判定が不要な問題は検証後すぐに返す。
+    """
     # CSVから生成するか、通常の方法で生成するか
     if hasattr(args, 'csv') and args.csv:
         # CSV生成時も--nが指定されていればそれを使う
@@ -33,184 +214,253 @@ async def generate_command_async(args):
     else:
         questions = await generator.generate_question(num_questions=args.num)
 
-    # 検証器の初期化（BAML統合版）
-    verifier = QuestionVerifier(use_baml=True)
+    use_cache = not getattr(args, 'no_cache', False)
     print("\n生成した問題を自動検証します...\n")
 
+    # 問題文からHand型を並列に抽出する（失敗した問題はhandがNoneのまま残り、抽出失敗として扱う）
+    from mahjong_ai_agent.baml_parser import extract_hand_from_question
+
+    extract_idx = [i for i, q in enumerate(questions) if q.question and q.hand is None]
+    hands = await asyncio.gather(
+        *(extract_hand_from_question(questions[i].question) for i in extract_idx), return_exceptions=True
+    )
+    for i, hand in zip(extract_idx, hands):
+        if isinstance(hand, Exception):
+            logger.warning("Hand extraction failed for question %s: %s", i, hand)
+        else:
+            questions[i].hand = hand
+
     # 並列バリデーションの実行（非同期）
-    # HandオブジェクトをJSON文字列に変換（Noneの場合はスキップ）
+    # HandオブジェクトのJSON文字列は1回だけ作成し、検証とファイル出力で使い回す
+    hand_jsons = [q.hand.model_dump_json() if q.hand else "{}" for q in questions]
+    # 検証できる問題だけをまとめて1回で検証する
     verification_details = []
-    for q in questions:
+    pending = []  # 問題のインデックス
+    for i, q in enumerate(questions):
         if q.generation_error:
             # 問題生成に失敗した場合
             details = {'is_verified': 0, 'error': f'Generation failed: {q.generation_error}', 'score': None}
         elif q.hand:
-            hand_json = q.hand.model_dump_json()
-            details = (await verifier.verify_batch([hand_json], [None]))[0]
+            details = None  # 一括検証の結果で後から埋める
+            pending.append(i)
         else:
             # Hand抽出に失敗した場合
             details = {'is_verified': 0, 'error': 'Hand extraction failed', 'score': None}
         verification_details.append(details)
 
+    if pending:
+        batch_details = await _verify_batch_cached(
+            verifier, [hand_jsons[i] for i in pending], [None] * len(pending), use_cache=use_cache,
+            hands=[questions[i].hand for i in pending],
+        )
+        for i, details in zip(pending, batch_details):
+            verification_details[i] = details
+
     # 計算された点数をexpected_scoreとして設定
     for q, details in zip(questions, verification_details):
         if details.get('score') is not None:
             q.expected_score = details['score']
 
-    # 指示適合性の判定（CSV生成時のみ）
-    compliance_results = []
-    has_instructions = any(q.instruction for q in questions)
+    # 指示適合性の判定（CSV生成時のみ）の対象
+    # 点数計算に失敗した手牌（役の無い手牌を含む）は判定しない
+    instruction_indices = [i for i, q in enumerate(questions) if q.instruction]
+    judge_idx = [i for i in instruction_indices if verification_details[i].get('score') is not None]
 
-    if has_instructions:
+    # 判定が不要な問題はすぐに返す
+    judge_set = set(judge_idx)
+    for i, (q, hand_json, details) in enumerate(zip(questions, hand_jsons, verification_details)):
+        if i not in judge_set:
+            yield i, q, hand_json, details, None
+
+    if judge_idx:
         logger.info("Judging instruction compliance with LLM...")
 
-        for q, details in zip(questions, verification_details):
-            if q.instruction and details.get('score') is not None:
-                compliance_result = await verifier.judge_instruction_compliance(
-                    q.instruction, details
-                )
-                compliance_results.append(compliance_result)
-            else:
-                compliance_results.append(None)
+    # --batch-api指定時、判定対象が多ければBatch APIでまとめて判定する（コスト半額、完了まで最大24時間）
+    if getattr(args, 'batch_api', False) and len(judge_idx) >= _BATCH_API_THRESHOLD:
+        compliance_results = await verifier.judge_batch_with_batch_api(
+            [(questions[i].instruction, verification_details[i]) for i in judge_idx]
+        )
+        for i, compliance_result in zip(judge_idx, compliance_results):
+            yield i, questions[i], hand_jsons[i], verification_details[i], compliance_result
+        return
 
-    return questions, verification_details, compliance_results
+    async def _judge(i):
+        return i, await verifier.judge_instruction_compliance(questions[i].instruction, verification_details[i])
+
+    # 判定対象の問題は並列に判定し、完了した順に返す
+    for done in asyncio.as_completed([_judge(i) for i in judge_idx]):
+        i, compliance_result = await done
+        yield i, questions[i], hand_jsons[i], verification_details[i], compliance_result
+
+
+def _format_question(i: int, q, details: dict, compliance_result, verbose: bool) -> str:
+    """1つの問題の検証結果を表示用の文字列にする"""
+    lines = []
+    ap = lines.append
+    ap(f"\n{'='*60}")
+    ap(f"問題 {i}:")
+    ap(f"{'='*60}")
+
+    # 指示があれば表示
+    if q.instruction:
+        ap(f"指示: {q.instruction}")
+        ap("")
+
+    # 生成エラーがあれば表示
+    if q.generation_error:
+        ap(f"⚠️  問題生成エラー: {q.generation_error}\n")
+    elif q.question:
+        ap(f"{q.question}\n")
+
+        # 抽出されたHandオブジェクトを表示
+        if q.hand:
+            ap("抽出された手牌情報:")
+            ap(q.hand.model_dump_json(indent=2))
+            ap("")
+    else:
+        ap("問題文が生成されませんでした\n")
+
+    if verbose and q.expected_score:
+        ap(f"計算された点数: {q.expected_score}\n")
+
+    # 検証結果を表示
+    result = details.get('is_verified', 0)
+    validation_status = "✓ 正しい" if result == 1 else "✗ 間違っている"
+    ap(f"検証結果: {validation_status} (スコア: {result})")
+
+    # 指示適合性の判定結果を表示
+    if compliance_result:
+        ap(f"指示適合性: {compliance_result}")
+
+    ap("")
+
+    # エラーメッセージがあれば表示
+    if details.get('error'):
+        ap(f"エラー: {details['error']}")
+        ap("")
+
+    # 詳細な検証結果を表示
+    # 役は常に表示する（指示適合性判定のため）
+    if details.get('yaku'):
+        ap(f"  役: {', '.join(details.get('yaku', []))}")
+        ap("")
+
+    # その他の詳細情報はverboseまたはエラー時のみ表示
+    if verbose or result != 1:
+        # エラーでない場合、または詳細情報がある場合のみ表示
+        has_details = (details.get('score') is not None or
+                      details.get('expected_score') is not None or
+                      details.get('han') is not None or
+                      details.get('fu') is not None)
+
+        if has_details:
+            if result != 1:
+                ap("詳細情報:")
+            if details.get('score') is not None:
+                ap(f"  計算された点数: {details.get('score')}")
+            if details.get('expected_score') is not None:
+                ap(f"  期待される点数: {details.get('expected_score')}")
+                if details.get('score') is not None:
+                    if details.get('score') == details.get('expected_score'):
+                        ap("  → 点数が一致しています！")
+                    else:
+                        ap(f"  → 点数が一致しません (差分: {details.get('score') - details.get('expected_score')})")
+            if details.get('han') is not None:
+                ap(f"  翻数: {details.get('han')}")
+            if details.get('fu') is not None:
+                ap(f"  符: {details.get('fu')}")
+            ap("")
 
+    return "\n".join(lines) + "\n"
 
-def generate_command(args):
-    """問題生成コマンド"""
-    import asyncio
-    questions, verification_details, compliance_results = asyncio.run(generate_command_async(args))
+
+async def _generate_and_report(args, generator, verifier, timestamp):
+    """問題を生成・検証し、結果が揃った問題から表示してファイルに書き出す"""
+    # 出力パスの決定（各問題の結果は表示しながら逐次書き出す）
+    output_path = Path(args.output) if args.output else _default_output_path("questions", timestamp)
+    # ファイルには元の問題順で書き出すため、先に揃った結果は一時的に保持する
+    ready: dict[int, dict] = {}
+    next_index = 0
 
     # 結果を表示
+    questions = []
     verification_results = []
-    for i, (q, details) in enumerate(zip(questions, verification_details), 1):
-        print(f"\n{'='*60}")
-        print(f"問題 {i}:")
-        print(f"{'='*60}")
-
-        # 指示があれば表示
-        if q.instruction:
-            print(f"指示: {q.instruction}")
-            print()
-
-        # 生成エラーがあれば表示
-        if q.generation_error:
-            print(f"⚠️  問題生成エラー: {q.generation_error}\n")
-        elif q.question:
-            print(f"{q.question}\n")
-
-            # 抽出されたHandオブジェクトを表示
-            if q.hand:
-                print("抽出された手牌情報:")
-                print(json.dumps(json.loads(q.hand.model_dump_json()), indent=2, ensure_ascii=False))
-                print()
-        else:
-            print("問題文が生成されませんでした\n")
-
-        if args.verbose and q.expected_score:
-            print(f"計算された点数: {q.expected_score}\n")
-
-        # 検証結果を表示
-        result = details.get('is_verified', 0)
-        validation_status = "✓ 正しい" if result == 1 else "✗ 間違っている"
-        print(f"検証結果: {validation_status} (スコア: {result})")
-
-        # 指示適合性の判定結果を表示
-        if compliance_results and i-1 < len(compliance_results) and compliance_results[i-1]:
-            print(f"指示適合性: {compliance_results[i-1]}")
-
-        print()
-
-        verification_results.append({
-            "question_number": i,
-            "is_verified": result == 1,
-            "score": result,
-            "calculated": details.get('score') is not None  # 点数計算ができたか
-        })
-
-        # エラーメッセージがあれば表示
-        if details.get('error'):
-            print(f"エラー: {details['error']}")
-            print()
-
-        # 詳細な検証結果を表示
-        # 役は常に表示する（指示適合性判定のため）
-        if details.get('yaku'):
-            print(f"  役: {', '.join(details.get('yaku', []))}")
-            print()
-
-        # その他の詳細情報はverboseまたはエラー時のみ表示
-        if args.verbose or result != 1:
-            # エラーでない場合、または詳細情報がある場合のみ表示
-            has_details = (details.get('score') is not None or
-                          details.get('expected_score') is not None or
-                          details.get('han') is not None or
-                          details.get('fu') is not None)
-
-            if has_details:
-                if result != 1:
-                    print("詳細情報:")
-                if details.get('score') is not None:
-                    print(f"  計算された点数: {details.get('score')}")
-                if details.get('expected_score') is not None:
-                    print(f"  期待される点数: {details.get('expected_score')}")
-                    if details.get('score') is not None:
-                        if details.get('score') == details.get('expected_score'):
-                            print("  → 点数が一致しています！")
-                        else:
-                            print(f"  → 点数が一致しません (差分: {details.get('score') - details.get('expected_score')})")
-                if details.get('han') is not None:
-                    print(f"  翻数: {details.get('han')}")
-                if details.get('fu') is not None:
-                    print(f"  符: {details.get('fu')}")
-                print()
-
-    # ファイルに保存
-    output_data = {
-        "model": args.model,
-        "questions": [
-            {
-                "question": q.question,
-                "hand_json": q.hand.model_dump_json() if q.hand else "{}",
-                "expected_score": q.expected_score,
-            }
-            for q in questions
-        ]
-    }
+    compliance_results = []
+    has_instructions = False
+    with _JsonArrayWriter(output_path, {"model": args.model}, "questions") as writer:
+        try:
+            async for index, q, hand_json, details, compliance_result in generate_command_async(args, generator, verifier):
+                i = index + 1
+                questions.append(q)
+                has_instructions = has_instructions or bool(q.instruction)
+                compliance_results.append(compliance_result)
+                result = details.get('is_verified', 0)
+                val_result = {
+                    "question_number": i,
+                    "is_verified": result == 1,
+                    "score": result,
+                    "calculated": details.get('score') is not None  # 点数計算ができたか
+                }
+                verification_results.append(val_result)
+
+                # 検証結果と点数計算ツールの結果も含めてファイルに書き出す
+                ready[index] = {
+                    "question": q.question,
+                    "hand_json": hand_json,
+                    "expected_score": q.expected_score,
+                    "validation": val_result,
+                    "calculator_result": {
+                        "score": details.get('score'),
+                        "han": details.get('han'),
+                        "fu": details.get('fu'),
+                        "yaku": details.get('yaku', []),
+                        "error": details.get('error')
+                    },
+                }
+                while next_index in ready:
+                    writer.write(ready.pop(next_index))
+                    next_index += 1
+
+                # 問題ごとに出力をまとめて1回のwriteで書き出す（--quiet指定時は表示用の文字列を作らない）
+                if args.quiet:
+                    logger.debug("Question %d: is_verified=%s, compliance=%s", i, result, compliance_result)
+                else:
+                    sys.stdout.write(_format_question(i, q, details, compliance_result, args.verbose))
+        finally:
+            # 中断された場合も、揃っている結果は元の問題順で書き出す
+            for index in sorted(ready):
+                writer.write(ready[index])
 
-    # 検証結果と点数計算結果も含める
-    for i, (val_result, details) in enumerate(zip(verification_results, verification_details)):
-        output_data["questions"][i]["validation"] = val_result
-        # 点数計算ツールの結果を追加
-        output_data["questions"][i]["calculator_result"] = {
-            "score": details.get('score'),
-            "han": details.get('han'),
-            "fu": details.get('fu'),
-            "yaku": details.get('yaku', []),
-            "error": details.get('error')
-        }
+    # 指示適合性の統計はCSV生成時（指示がある場合）のみ表示する
+    if not has_instructions:
+        compliance_results = []
+    return questions, verification_results, compliance_results, output_path
 
-    # 出力パスの決定
-    if args.output:
-        output_path = Path(args.output)
-    else:
-        # デフォルトでdistディレクトリに保存
-        dist_dir = Path("dist")
-        dist_dir.mkdir(exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = dist_dir / f"questions_{timestamp}.json"
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+async def generate_command(args):
+    """問題生成コマンド"""
+    timestamp = _run_timestamp()
+    async with _command_components(args) as (generator, verifier):
+        questions, verification_results, compliance_results, output_path = (
+            await _generate_and_report(args, generator, verifier, timestamp)
+        )
 
     # 統計情報を表示
     print(f"\n{'='*60}")
     print("検証統計:")
     print(f"{'='*60}")
     total = len(verification_results)
-    generation_failed = sum(1 for q in questions if q.generation_error)
-    calculated = sum(1 for r in verification_results if r["calculated"])
-    correct = sum(1 for r in verification_results if r["is_verified"])
+    # 1回の走査で指示適合性も含めた全てのカウンタを集計する
+    generation_failed = calculated = correct = 0
+    judged_count = compliant_count = non_compliant_count = 0
+    for q, r, c in zip(questions, verification_results, compliance_results or [None] * total):
+        generation_failed += bool(q.generation_error)
+        calculated += r["calculated"]
+        correct += r["is_verified"]
+        if c:
+            judged_count += 1
+            compliant_count += c.startswith("Yes")
+            non_compliant_count += c.startswith("No")
     incorrect = total - correct
     accuracy = (correct / total * 100) if total > 0 else 0
     calc_rate = (calculated / total * 100) if total > 0 else 0
@@ -225,9 +475,7 @@ def generate_command(args):
 
     # 指示適合性の統計
     if compliance_results:
-        compliant_count = sum(1 for c in compliance_results if c and "Yes" in c)
-        non_compliant_count = sum(1 for c in compliance_results if c and "No" in c)
-        compliance_rate = (compliant_count / len([c for c in compliance_results if c]) * 100) if any(compliance_results) else 0
+        compliance_rate = (compliant_count / judged_count * 100) if judged_count else 0
         print(f"\n指示適合性:")
         print(f"適合: {compliant_count}")
         print(f"不適合: {non_compliant_count}")
@@ -244,16 +492,18 @@ async def repeated_sampling_async_with_instances(generator, verifier, args):
     instruction = args.instruction if hasattr(args, 'instruction') and args.instruction else ""
     num_candidates = args.candidates if hasattr(args, 'candidates') else 10
 
-    print(f"\n{'='*60}")
-    print(f"Repeated Sampling開始")
-    print(f"{'='*60}")
-    print(f"指示: {instruction if instruction else '(デフォルト)'}")
-    print(f"候補数: {num_candidates}")
-    print(f"モデル: {args.model}")
-    print(f"{'='*60}\n")
+    # -q指定時（CSVの多数の指示を並列実行する場合など）は開始時の表示を省く
+    if not getattr(args, 'quiet', False):
+        print(f"\n{'='*60}")
+        print(f"Repeated Sampling開始")
+        print(f"{'='*60}")
+        print(f"指示: {instruction if instruction else '(デフォルト)'}")
+        print(f"候補数: {num_candidates}")
+        print(f"モデル: {args.model}")
+        print(f"{'='*60}\n")
 
     # 並列で候補を生成
-    logger.info(f"Generating {num_candidates} candidates in parallel...")
+    logger.info("Generating %s candidates in parallel...", num_candidates)
     candidates = await generator.generate_question(
         num_questions=num_candidates,
         instruction=instruction
@@ -285,7 +535,7 @@ async def repeated_sampling_async_with_instances(generator, verifier, args):
 
     # Verifierで全ての候補を並列で検証（BAML→Python→LLM-as-a-Judge）
     if valid_questions:
-        logger.info(f"Verifying {len(valid_questions)} candidates in parallel (BAML→Python→LLM-as-a-Judge)...")
+        logger.info("Verifying %s candidates in parallel (BAML→Python→LLM-as-a-Judge)...", len(valid_questions))
         instructions_list = [instruction] * len(valid_questions)
         verification_details = await verifier.verify_batch_from_questions(
             valid_questions, instructions_list, [None] * len(valid_questions)
@@ -342,20 +592,27 @@ async def repeated_sampling_async_with_instances(generator, verifier, args):
     return valid_candidates, len(candidates), candidate_results
 
 
-async def repeated_sampling_async(args):
-    """Repeated Sampling実装（非同期版）"""
-    generator = QuestionGenerator(
-        model=args.model,
-        enable_langfuse=args.langfuse if hasattr(args, 'langfuse') else False
-    )
-    verifier = QuestionVerifier(use_baml=True)
-    
-    return await repeated_sampling_async_with_instances(generator, verifier, args)
+def _parse_compliance(compliance_text: str) -> tuple[str, str]:
+    """LLM-as-a-Judgeの判定結果を（適合性, 理由）に分解する
+
+    判定結果はQuestionVerifierで"Yes/No\n理由: ..."の形式に整形済みなので、
+    1行目をそのまま適合性として使い、再解析はしない
+    """
+    compliance_status, _, rest = compliance_text.partition('\n')
+    rest = rest.strip()
+    compliance_reason = rest.removeprefix('理由:').strip()
+    return compliance_status.strip(), compliance_reason
+
+
+def _is_compliant(cand: dict) -> bool:
+    """LLM-as-a-Judgeが実行され、指示に適合すると判断された候補かどうか"""
+    d = cand.get('details') or {}
+    return bool(d.get('compliance_judged')) and str(d.get('compliance_result') or '').startswith("Yes")
 
 
 async def _process_single_instruction(generator, verifier, args, instruction, instruction_index):
     """単一の指示を処理するヘルパー関数"""
-    logger.info(f"Processing instruction {instruction_index}/{len(args.instructions)}: {instruction}")
+    logger.info("Processing instruction %s/%s: %s", instruction_index, len(args.instructions), instruction)
 
     # argsを一時的に更新
     temp_args = argparse.Namespace(**vars(args))
@@ -365,31 +622,19 @@ async def _process_single_instruction(generator, verifier, args, instruction, in
         generator, verifier, temp_args
     )
     
-    # 指示適合性が"Yes"の候補数を集計（LLM-as-a-Judgeが実行され、適合と判断した候補）
-    compliant_candidates_for_instruction = [
-        cand for cand in valid_candidates
-        if (cand.get('details', {}).get('compliance_judged', False) and
-            cand.get('details', {}).get('compliance_result') and
-            "Yes" in str(cand.get('details', {}).get('compliance_result', '')))
-    ]
-
     # 有効な候補から指示適合性が高いものを優先的に選択
     # 指示適合性が"Yes"の候補を優先（LLM-as-a-Judgeが実行され、適合と判断した候補）
-    compliant_candidates = [
-        cand for cand in valid_candidates
-        if (cand.get('details', {}).get('compliance_judged', False) and
-            cand.get('details', {}).get('compliance_result') and
-            "Yes" in str(cand.get('details', {}).get('compliance_result', '')))
-    ]
+    # 候補リストをコピーせず、適合候補のインデックスだけを保持する
+    compliant_idx: list[int] = [i for i, cand in enumerate(valid_candidates) if _is_compliant(cand)]
     
     selected = None
     details = None
     compliance_result = None
     
-    if compliant_candidates:
+    if compliant_idx:
         # 指示適合性が"Yes"の候補からランダムに選択
-        selected = random.choice(compliant_candidates)
-        logger.info(f"Selected from {len(compliant_candidates)} compliant candidates")
+        selected = valid_candidates[random.choice(compliant_idx)]
+        logger.info("Selected from %s compliant candidates", len(compliant_idx))
         
         candidate = selected['candidate']
         details = selected['details']
@@ -399,7 +644,7 @@ async def _process_single_instruction(generator, verifier, args, instruction, in
             "instruction": instruction,
             "total_candidates": total_candidates,
             "valid_candidates": len(valid_candidates),
-            "compliant_candidates": len(compliant_candidates),
+            "compliant_candidates": len(compliant_idx),
             "success": True,  # LLM-as-a-Judgeが適合と判断した候補が見つかった
             "selected_candidate_number": selected['candidate_number'],
             "question": candidate.question,
@@ -418,7 +663,7 @@ async def _process_single_instruction(generator, verifier, args, instruction, in
         # 計算成功した候補はあるが、LLM-as-a-Judgeが適合と判断した候補がない場合
         # フォールバックとして全てからランダムに選択
         selected = random.choice(valid_candidates)
-        logger.info(f"No compliant candidates found, selected from all {len(valid_candidates)} candidates")
+        logger.info("No compliant candidates found, selected from all %s candidates", len(valid_candidates))
         
         candidate = selected['candidate']
         details = selected['details']
@@ -459,59 +704,202 @@ async def _process_single_instruction(generator, verifier, args, instruction, in
         'instruction': instruction,
         'total_candidates': total_candidates,
         'valid_candidates': len(valid_candidates),
-        'compliant_candidates': len(compliant_candidates_for_instruction) if valid_candidates else 0,
+        'compliant_candidates': len(compliant_idx),
         'candidate_results': candidate_results,
         'selected_candidate': selected if valid_candidates else None,
         'selected_details': details if valid_candidates else None,
         'compliance_result': compliance_result if valid_candidates else None
     }
     
-    return result, instruction_result, total_candidates, len(valid_candidates), len(compliant_candidates_for_instruction), success
+    return result, instruction_result, total_candidates, len(valid_candidates), len(compliant_idx), success
+
+
+async def _result_writer(queue: asyncio.Queue, f) -> None:
+    """キューから受け取った指示ごとの結果をJSON Linesとして逐次書き出す"""
+    while True:
+        record = await queue.get()
+        if record is None:
+            break
+        f.write(orjson.dumps(record) + b"\n")
+        # 指示1件の処理は数秒以上かかるため、1件ごとにflushして途中経過を残す
+        f.flush()
+
+
+def _load_results(results_path: Path, instructions: list[str]) -> list[dict]:
+    """既存の指示ごとの結果(JSON Lines)から完了済みの結果だけを読み込み、ファイルもそれだけに書き直す
+
+    完了済みの判定は (指示の番号, 指示) で行う（同じ指示が複数行あっても別々に扱う）。
+    中断で壊れた行、今回の指示リストに含まれない結果、例外で失敗した結果（再実行する）は除き、
+    同じ指示の結果が重複していれば最初の1件だけを残す。
+    """
+    current_keys = {(i + 1, instruction) for i, instruction in enumerate(instructions)}
+    done: dict[tuple[int, str], dict] = {}
+    for line in results_path.read_bytes().splitlines():
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            logger.warning("Skipping broken line in %s", results_path)
+            continue
+        key = (record.get("instruction_index"), record.get("instruction"))
+        if key in current_keys and not record.get("error"):
+            done.setdefault(key, record)
+    records = list(done.values())
+    _write_atomic(results_path, b"".join(orjson.dumps(r) + b"\n" for r in records))
+    return records
+
+
+def _add_to_summary(summary: dict, record: dict) -> None:
+    """1つの指示の結果を全体の集計に加える"""
+    summary["total_candidates_generated"] += record.get("total_candidates", 0)
+    summary["total_valid_candidates"] += record.get("valid_candidates", 0)
+    summary["total_compliant_candidates"] += record.get("compliant_candidates", 0)
+    if record.get("success"):
+        summary["total_success"] += 1
+    else:
+        summary["total_failure"] += 1
+    counts = record.get("candidate_counts") or {}
+    summary["total_baml_success"] += counts.get("baml_success", 0)
+    summary["total_calculation_success"] += counts.get("calculation_success", 0)
+    summary["total_compliance_judged"] += counts.get("compliance_judged", 0)
+    summary["total_compliant_count"] += counts.get("compliant_count", 0)
+
+
+def _count_candidate_results(candidate_results: list[dict]) -> tuple[int, int, int, int]:
+    """(BAML抽出成功, 点数計算成功, Judge実行, 指示適合) の候補数を数える"""
+    baml_success = calculation_success = compliance_judged = compliant_count = 0
+    for cand_result in candidate_results:
+        baml_success += bool(cand_result.get('baml_extracted'))
+        calculation_success += bool(cand_result.get('calculation_success'))
+        if cand_result.get('compliance_judged'):
+            compliance_judged += 1
+            compliant_count += str(cand_result.get('compliance') or '').startswith("Yes")
+    return baml_success, calculation_success, compliance_judged, compliant_count
+
+
+def _report_instruction(inst_result: dict, num_instructions: int, quiet: bool = False) -> tuple[int, int, int, int]:
+    """1つの指示の結果を表示し、(BAML抽出成功, 点数計算成功, Judge実行, 指示適合) の候補数を返す"""
+    counts = _count_candidate_results(inst_result['candidate_results'])
+    if quiet:
+        # 表示しない場合は集計のみ行う
+        logger.debug("Instruction %d: counts=%s", inst_result['instruction_number'], counts)
+        return counts
+    baml_success, calculation_success, compliance_judged, compliant_count = counts
+
+    # 指示ごとに出力をまとめて1回のwriteで書き出す
+    lines = []
+    ap = lines.append
+    ap(f"\n{'='*60}")
+    ap(f"指示 {inst_result['instruction_number']}/{num_instructions}")
+    ap(f"{'='*60}")
+    ap(f"指示内容: {inst_result['instruction']}")
+    ap("")
+
+    # 各候補の結果を表示
+    for cand_result in inst_result['candidate_results']:
+        if cand_result['status'] == 'generation_failed':
+            ap(f"候補 {cand_result['candidate_number']}: 生成失敗 - {cand_result['error']}")
+        elif cand_result['status'] == 'baml_extraction_failed':
+            ap(f"候補 {cand_result['candidate_number']}: ✗ BAML抽出失敗 - {cand_result['error']}")
+        elif cand_result['status'] == 'calculation_failed':
+            ap(f"候補 {cand_result['candidate_number']}: ✓ BAML抽出成功, ✗ 計算失敗 - {cand_result['error']}")
+        elif cand_result['status'] == 'verified':
+            num = cand_result['candidate_number']
+            score = cand_result['score']
+            yaku_str = ', '.join(cand_result['yaku'])
+            compliance_status = ""
+            compliance_reason = ""
+            if cand_result.get('compliance'):
+                compliance_status, compliance_reason = _parse_compliance(cand_result['compliance'])
+
+            ap(f"候補 {num}: ✓ BAML抽出成功, ✓ 計算成功 (点数: {score}, 役: {yaku_str})")
+            if compliance_status:
+                ap(f"  指示適合性: {compliance_status}")
+                if compliance_reason:
+                    ap(f"  理由: {compliance_reason}")
+
+    # 結果の統計を表示
+    ap(f"\n{'='*60}")
+    ap(f"指示 {inst_result['instruction_number']} の結果:")
+    ap(f"{'='*60}")
+    ap(f"総候補数: {inst_result['total_candidates']}")
+
+    # 3つの成功率を計算
+    baml_rate = (baml_success / inst_result['total_candidates'] * 100) if inst_result['total_candidates'] > 0 else 0
+    calculation_rate = (calculation_success / baml_success * 100) if baml_success > 0 else 0
+    compliance_rate = (compliant_count / compliance_judged * 100) if compliance_judged > 0 else 0
+
+    ap(f"BAML抽出成功: {baml_success}")
+    ap(f"BAML抽出成功率: {baml_rate:.1f}%")
+    ap(f"点数計算成功: {calculation_success}")
+    ap(f"点数計算成功率: {calculation_rate:.1f}%")
+    if compliance_judged > 0:
+        ap(f"LLM-as-a-Judge実行: {compliance_judged}")
+        ap(f"指示適合候補: {compliant_count}")
+        ap(f"LLM-as-a-Judge成功率: {compliance_rate:.1f}%")
+    else:
+        ap(f"LLM-as-a-Judge実行: 0")
+        ap(f"LLM-as-a-Judge成功率: N/A (計算成功した候補がありません)")
+
+    # 選択された候補を表示
+    if inst_result['selected_candidate']:
+        selected = inst_result['selected_candidate']
+        details = inst_result['selected_details']
+        ap(f"\n選択された候補 {selected['candidate_number']}:")
+        ap(f"点数: {details.get('score')}, 役: {', '.join(details.get('yaku', []))}")
+        if inst_result.get('compliance_result'):
+            ap(f"指示適合性: {inst_result['compliance_result']}")
+
+    sys.stdout.write("\n".join(lines) + "\n")
+    return counts
 
 
-async def repeated_sampling_csv_async(args, instructions):
-    """CSV指示リストに対してRepeated Samplingを実行（非同期版）"""
+async def repeated_sampling_csv_async(args, generator, verifier, instructions, results_path, done_records=()):
+    """CSV指示リストに対してRepeated Samplingを実行（非同期版）
+
+    各指示の結果は完了した順に表示して results_path (JSON Lines) へ書き出し、
+    メモリには集計用のカウンタのみを保持する。
+    done_records（_load_resultsで読み込んだ完了済みの結果）の指示はスキップして集計にのみ加える。
+    """
     # 一時的にinstructionsをargsに追加（_process_single_instructionで使用）
     args.instructions = instructions
     
-    # GeneratorとVerifierのインスタンスを一度だけ作成して共有
-    generator = QuestionGenerator(
-        model=args.model,
-        enable_langfuse=args.langfuse if hasattr(args, 'langfuse') else False
-    )
-    verifier = QuestionVerifier(use_baml=True)
-    
-    # 全ての指示を並列で処理
-    logger.info(f"Processing {len(instructions)} instructions in parallel...")
-    tasks = [
-        _process_single_instruction(generator, verifier, args, instruction, i + 1)
-        for i, instruction in enumerate(instructions)
-    ]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # 結果を集計
-    all_results = []
-    total_success = 0
-    total_failure = 0
-    total_candidates_generated = 0
-    total_valid_candidates = 0
-    total_compliant_candidates = 0
-    instruction_results = []  # 各指示の結果を保存（表示用）
-
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            logger.error(f"Error processing instruction {i+1}: {result}", exc_info=True)
+    # 結果を集計（前回までに完了した指示の結果も含める）
+    summary = {
+        "total_success": 0,
+        "total_failure": 0,
+        "total_candidates_generated": 0,
+        "total_valid_candidates": 0,
+        "total_compliant_candidates": 0,
+        "total_baml_success": 0,
+        "total_calculation_success": 0,
+        "total_compliance_judged": 0,
+        "total_compliant_count": 0,
+    }
+    done = {(record["instruction_index"], record["instruction"]) for record in done_records}
+    for record in done_records:
+        _add_to_summary(summary, record)
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _process_and_record(instruction, instruction_index):
+        try:
+            result_dict, instruction_result, *_ = (
+                await _process_single_instruction(generator, verifier, args, instruction, instruction_index)
+            )
+        except Exception as e:
+            logger.error("Error processing instruction %s: %s", instruction_index, e, exc_info=True)
             # エラーが発生した場合のデフォルト結果
-            all_results.append({
-                "instruction": instructions[i],
+            result_dict = {
+                "instruction": instruction,
                 "total_candidates": 0,
                 "valid_candidates": 0,
                 "compliant_candidates": 0,
-                "success": False
-            })
-            instruction_results.append({
-                'instruction_number': i + 1,
-                'instruction': instructions[i],
+                "success": False,
+                "error": True,  # --resume時に再実行する
+            }
+            instruction_result = {
+                'instruction_number': instruction_index,
+                'instruction': instruction,
                 'total_candidates': 0,
                 'valid_candidates': 0,
                 'compliant_candidates': 0,
@@ -519,27 +907,45 @@ async def repeated_sampling_csv_async(args, instructions):
                 'selected_candidate': None,
                 'selected_details': None,
                 'compliance_result': None
-            })
-            total_failure += 1
-        else:
-            result_dict, instruction_result, total_candidates, valid_count, compliant_count, success = result
-            all_results.append(result_dict)
-            instruction_results.append(instruction_result)
-            total_candidates_generated += total_candidates
-            total_valid_candidates += valid_count
-            total_compliant_candidates += compliant_count
-            if success:
-                total_success += 1
-            else:
-                total_failure += 1
+            }
 
-    return all_results, total_success, total_failure, total_candidates_generated, total_valid_candidates, total_compliant_candidates, instruction_results
+        # 完了した指示から順に表示し、候補ごとの詳細は保持しない
+        baml_success, calculation_success, compliance_judged, compliant_count = (
+            _report_instruction(instruction_result, len(instructions), getattr(args, 'quiet', False))
+        )
+        # 再開時に集計を復元できるよう、指示の番号と候補ごとの成功数も結果に残す
+        result_dict["instruction_index"] = instruction_index
+        result_dict["candidate_counts"] = {
+            "baml_success": baml_success,
+            "calculation_success": calculation_success,
+            "compliance_judged": compliance_judged,
+            "compliant_count": compliant_count,
+        }
+        _add_to_summary(summary, result_dict)
+        await queue.put(result_dict)
 
+    tasks = [
+        _process_and_record(instruction, i + 1)
+        for i, instruction in enumerate(instructions)
+        if (i + 1, instruction) not in done
+    ]
+    if done_records:
+        logger.info("Skipping %s already completed instructions", len(instructions) - len(tasks))
 
-def repeated_sampling_command(args):
-    """Repeated Samplingコマンド"""
-    import asyncio
+    # 全ての指示を並列で処理（再開時は既存の結果に追記する）
+    logger.info("Processing %s instructions in parallel...", len(tasks))
+    with open(results_path, "ab" if done_records else "wb") as f:
+        writer = asyncio.create_task(_result_writer(queue, f))
+        await asyncio.gather(*tasks)
+        await queue.put(None)
+        await writer
 
+    return summary
+
+
+async def repeated_sampling_command(args):
+    """Repeated Samplingコマンド"""
+    timestamp = _run_timestamp()
     # CSVから指示を読み込む場合
     if hasattr(args, 'csv') and args.csv:
         # CSVファイルを読み込む
@@ -549,125 +955,39 @@ def repeated_sampling_command(args):
             for row in reader:
                 instructions.append(row['instruction'])
 
-        logger.info(f"Loaded {len(instructions)} instructions from {args.csv}")
+        logger.info("Loaded %s instructions from %s", len(instructions), args.csv)
 
         # -nオプションが指定されている場合、ランダムに選択
         if hasattr(args, 'num') and args.num > 0 and args.num < len(instructions):
             instructions = random.sample(instructions, args.num)
-            logger.info(f"Randomly selected {args.num} instructions from CSV")
-
-        # 全ての指示を一つの非同期関数で処理
-        all_results, total_success, total_failure, total_candidates_generated, total_valid_candidates, total_compliant_candidates, instruction_results = asyncio.run(
-            repeated_sampling_csv_async(args, instructions)
-        )
-
-        # 各指示の結果を表示
-        for inst_result in instruction_results:
-            print(f"\n{'='*60}")
-            print(f"指示 {inst_result['instruction_number']}/{len(instructions)}")
-            print(f"{'='*60}")
-            print(f"指示内容: {inst_result['instruction']}")
-            print()
-            
-            # 各候補の結果を表示
-            for cand_result in inst_result['candidate_results']:
-                if cand_result['status'] == 'generation_failed':
-                    print(f"候補 {cand_result['candidate_number']}: 生成失敗 - {cand_result['error']}")
-                elif cand_result['status'] == 'baml_extraction_failed':
-                    print(f"候補 {cand_result['candidate_number']}: ✗ BAML抽出失敗 - {cand_result['error']}")
-                elif cand_result['status'] == 'calculation_failed':
-                    print(f"候補 {cand_result['candidate_number']}: ✓ BAML抽出成功, ✗ 計算失敗 - {cand_result['error']}")
-                elif cand_result['status'] == 'verified':
-                    compliance_status = ""
-                    compliance_reason = ""
-                    if 'compliance' in cand_result and cand_result['compliance']:
-                        compliance_text = cand_result['compliance'].strip()
-                        compliance_lines = [line.strip() for line in compliance_text.split('\n') if line.strip()]
-                        first_line = compliance_lines[0] if compliance_lines else ""
-                        
-                        # プレフィックス（「回答形式:」「回答形式」など）を除去
-                        first_line_clean = first_line
-                        for prefix in ['回答形式:', '回答形式', '回答:', '回答']:
-                            if first_line_clean.startswith(prefix):
-                                first_line_clean = first_line_clean[len(prefix):].strip()
-                                break
-                        
-                        # 「Yes」または「No」を抽出（大文字小文字を区別しない）
-                        first_line_upper = first_line_clean.upper()
-                        if first_line_upper.startswith('YES'):
-                            compliance_status = "Yes"
-                        elif first_line_upper.startswith('NO'):
-                            compliance_status = "No"
-                        else:
-                            # 最初の行に「Yes」または「No」がない場合、レスポンス全体から検索
-                            compliance_clean = compliance_text
-                            for prefix in ['回答形式:', '回答形式', '回答:', '回答']:
-                                compliance_clean = compliance_clean.replace(prefix, '').strip()
-                            
-                            compliance_upper = compliance_clean.upper()
-                            yes_pos = compliance_upper.find("YES")
-                            no_pos = compliance_upper.find("NO")
-                            
-                            if yes_pos != -1 and (no_pos == -1 or yes_pos < no_pos):
-                                compliance_status = "Yes"
-                            elif no_pos != -1:
-                                compliance_status = "No"
-                            else:
-                                compliance_status = first_line_clean if first_line_clean else "Unknown"
-                        
-                        # 理由を抽出（"理由:"以降）
-                        for line in compliance_lines[1:]:
-                            if '理由' in line or 'reason' in line.lower():
-                                compliance_reason = line.split(':', 1)[-1].strip() if ':' in line else line.strip()
-                                break
-                        if not compliance_reason and len(compliance_lines) > 1:
-                            compliance_reason = '\n'.join(compliance_lines[1:]).strip()
-                    
-                    print(f"候補 {cand_result['candidate_number']}: ✓ BAML抽出成功, ✓ 計算成功 (点数: {cand_result['score']}, 役: {', '.join(cand_result['yaku'])})")
-                    if compliance_status:
-                        print(f"  指示適合性: {compliance_status}")
-                        if compliance_reason:
-                            print(f"  理由: {compliance_reason}")
-            
-            # 結果の統計を表示
-            print(f"\n{'='*60}")
-            print(f"指示 {inst_result['instruction_number']} の結果:")
-            print(f"{'='*60}")
-            print(f"総候補数: {inst_result['total_candidates']}")
-            
-            # 3つの成功率を計算
-            baml_success = sum(1 for cr in inst_result['candidate_results'] if cr.get('baml_extracted', False))
-            calculation_success = sum(1 for cr in inst_result['candidate_results'] if cr.get('calculation_success', False))
-            compliance_judged = sum(1 for cr in inst_result['candidate_results'] if cr.get('compliance_judged', False))
-            compliant_count = sum(1 for cr in inst_result['candidate_results'] 
-                                 if (cr.get('compliance_judged', False) and
-                                     cr.get('compliance') and
-                                     "Yes" in str(cr.get('compliance', ''))))
-            
-            baml_rate = (baml_success / inst_result['total_candidates'] * 100) if inst_result['total_candidates'] > 0 else 0
-            calculation_rate = (calculation_success / baml_success * 100) if baml_success > 0 else 0
-            compliance_rate = (compliant_count / compliance_judged * 100) if compliance_judged > 0 else 0
-            
-            print(f"BAML抽出成功: {baml_success}")
-            print(f"BAML抽出成功率: {baml_rate:.1f}%")
-            print(f"点数計算成功: {calculation_success}")
-            print(f"点数計算成功率: {calculation_rate:.1f}%")
-            if compliance_judged > 0:
-                print(f"LLM-as-a-Judge実行: {compliance_judged}")
-                print(f"指示適合候補: {compliant_count}")
-                print(f"LLM-as-a-Judge成功率: {compliance_rate:.1f}%")
+            logger.info("Randomly selected %s instructions from CSV", args.num)
+
+        # 出力パスの決定（各指示の結果は {stem}.results.jsonl に逐次書き出す）
+        # -o foo.jsonl のように指定されても集計結果と同じファイルにならないよう、拡張子ごと置き換える
+        output_path = Path(args.output) if args.output else _default_output_path("repeated_sampling_csv", timestamp)
+        results_path = output_path.with_name(f"{output_path.stem}.results.jsonl")
+
+        # --resume指定時は前回の結果を読み込み、完了済みの指示をスキップする
+        done_records = []
+        if getattr(args, 'resume', False):
+            if results_path.exists():
+                done_records = _load_results(results_path, instructions)
+                logger.info("Resuming from %s (%s completed instructions)", results_path, len(done_records))
             else:
-                print(f"LLM-as-a-Judge実行: 0")
-                print(f"LLM-as-a-Judge成功率: N/A (計算成功した候補がありません)")
-            
-            # 選択された候補を表示
-            if inst_result['selected_candidate']:
-                selected = inst_result['selected_candidate']
-                details = inst_result['selected_details']
-                print(f"\n選択された候補 {selected['candidate_number']}:")
-                print(f"点数: {details.get('score')}, 役: {', '.join(details.get('yaku', []))}")
-                if inst_result.get('compliance_result'):
-                    print(f"指示適合性: {inst_result['compliance_result']}")
+                logger.warning("No previous results found at %s; running all instructions", results_path)
+
+        # 全ての指示を一つの非同期関数で処理（各指示の結果は完了した順に表示される）
+        async with _command_components(args) as (generator, verifier):
+            summary = await repeated_sampling_csv_async(
+                args, generator, verifier, instructions, results_path, done_records
+            )
+        total_success = summary["total_success"]
+        total_failure = summary["total_failure"]
+        total_candidates_generated = summary["total_candidates_generated"]
+        total_baml_success = summary["total_baml_success"]
+        total_calculation_success = summary["total_calculation_success"]
+        total_compliance_judged = summary["total_compliance_judged"]
+        total_compliant_count = summary["total_compliant_count"]
 
         # 全体の統計を表示
         print(f"\n{'='*60}")
@@ -681,26 +1001,6 @@ def repeated_sampling_command(args):
         print(f"平均候補数/指示: {total_candidates_generated / len(instructions):.1f}")
         
         # 全体の3つの成功率を計算
-        total_baml_success = sum(
-            sum(1 for cr in inst_result['candidate_results'] if cr.get('baml_extracted', False))
-            for inst_result in instruction_results
-        )
-        total_calculation_success = sum(
-            sum(1 for cr in inst_result['candidate_results'] if cr.get('calculation_success', False))
-            for inst_result in instruction_results
-        )
-        total_compliance_judged = sum(
-            sum(1 for cr in inst_result['candidate_results'] if cr.get('compliance_judged', False))
-            for inst_result in instruction_results
-        )
-        total_compliant_count = sum(
-            sum(1 for cr in inst_result['candidate_results'] 
-                if (cr.get('compliance_judged', False) and
-                    cr.get('compliance') and
-                    "Yes" in str(cr.get('compliance', ''))))
-            for inst_result in instruction_results
-        )
-
         overall_baml_rate = (total_baml_success / total_candidates_generated * 100) if total_candidates_generated > 0 else 0
         overall_calculation_rate = (total_calculation_success / total_baml_success * 100) if total_baml_success > 0 else 0
         overall_compliance_rate = (total_compliant_count / total_compliance_judged * 100) if total_compliance_judged > 0 else 0
@@ -726,88 +1026,51 @@ def repeated_sampling_command(args):
             "total_failure": total_failure,
             "success_rate": total_success / len(instructions) * 100 if len(instructions) > 0 else 0,
             "total_candidates_generated": total_candidates_generated,
-            "results": all_results
+            "results_path": str(results_path)
         }
 
-        # 出力パスの決定
-        if args.output:
-            output_path = Path(args.output)
-        else:
-            dist_dir = Path("dist")
-            dist_dir.mkdir(exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = dist_dir / f"repeated_sampling_csv_{timestamp}.json"
-
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        _dump(output_path, output_data)
 
         print(f"\n{'='*60}")
-        print(f"結果を {output_path} に保存しました")
+        print(f"集計結果を {output_path} に保存しました")
+        print(f"各指示の結果を {results_path} に保存しました")
         print(f"{'='*60}")
 
     else:
         # 単一の指示の場合（既存のロジック）
-        valid_candidates, total_candidates, candidate_results = asyncio.run(repeated_sampling_async(args))
-
-        # 各候補の結果を表示
-        for cand_result in candidate_results:
-            if cand_result['status'] == 'generation_failed':
-                print(f"候補 {cand_result['candidate_number']}: 生成失敗 - {cand_result['error']}")
-            elif cand_result['status'] == 'baml_extraction_failed':
-                print(f"候補 {cand_result['candidate_number']}: ✗ BAML抽出失敗 - {cand_result['error']}")
-            elif cand_result['status'] == 'calculation_failed':
-                print(f"候補 {cand_result['candidate_number']}: ✓ BAML抽出成功, ✗ 計算失敗 - {cand_result['error']}")
-            elif cand_result['status'] == 'verified':
-                compliance_status = ""
-                compliance_reason = ""
-                if 'compliance' in cand_result and cand_result['compliance']:
-                    compliance_text = cand_result['compliance'].strip()
-                    compliance_lines = [line.strip() for line in compliance_text.split('\n') if line.strip()]
-                    first_line = compliance_lines[0] if compliance_lines else ""
-                    
-                    # プレフィックス（「回答形式:」「回答形式」など）を除去
-                    first_line_clean = first_line
-                    for prefix in ['回答形式:', '回答形式', '回答:', '回答']:
-                        if first_line_clean.startswith(prefix):
-                            first_line_clean = first_line_clean[len(prefix):].strip()
-                            break
-                    
-                    # 「Yes」または「No」を抽出（大文字小文字を区別しない）
-                    first_line_upper = first_line_clean.upper()
-                    if first_line_upper.startswith('YES'):
-                        compliance_status = "Yes"
-                    elif first_line_upper.startswith('NO'):
-                        compliance_status = "No"
-                    else:
-                        # 最初の行に「Yes」または「No」がない場合、レスポンス全体から検索
-                        compliance_clean = compliance_text
-                        for prefix in ['回答形式:', '回答形式', '回答:', '回答']:
-                            compliance_clean = compliance_clean.replace(prefix, '').strip()
-                        
-                        compliance_upper = compliance_clean.upper()
-                        yes_pos = compliance_upper.find("YES")
-                        no_pos = compliance_upper.find("NO")
-                        
-                        if yes_pos != -1 and (no_pos == -1 or yes_pos < no_pos):
-                            compliance_status = "Yes"
-                        elif no_pos != -1:
-                            compliance_status = "No"
-                        else:
-                            compliance_status = first_line_clean if first_line_clean else "Unknown"
-                    
-                    # 理由を抽出（"理由:"以降）
-                    for line in compliance_lines[1:]:
-                        if '理由' in line or 'reason' in line.lower():
-                            compliance_reason = line.split(':', 1)[-1].strip() if ':' in line else line.strip()
-                            break
-                    if not compliance_reason and len(compliance_lines) > 1:
-                        compliance_reason = '\n'.join(compliance_lines[1:]).strip()
+        async with _command_components(args) as (generator, verifier):
+            valid_candidates, total_candidates, candidate_results = (
+                await repeated_sampling_async_with_instances(generator, verifier, args)
+            )
+
+        baml_success, calculation_success, compliance_judged, _ = _count_candidate_results(candidate_results)
+        if not getattr(args, 'quiet', False):
+            # 各候補の結果を表示（出力はまとめて1回のwriteで書き出す）
+            lines = []
+            ap = lines.append
+            for cand_result in candidate_results:
+                if cand_result['status'] == 'generation_failed':
+                    ap(f"候補 {cand_result['candidate_number']}: 生成失敗 - {cand_result['error']}")
+                elif cand_result['status'] == 'baml_extraction_failed':
+                    ap(f"候補 {cand_result['candidate_number']}: ✗ BAML抽出失敗 - {cand_result['error']}")
+                elif cand_result['status'] == 'calculation_failed':
+                    ap(f"候補 {cand_result['candidate_number']}: ✓ BAML抽出成功, ✗ 計算失敗 - {cand_result['error']}")
+                elif cand_result['status'] == 'verified':
+                    num = cand_result['candidate_number']
+                    score = cand_result['score']
+                    yaku_str = ', '.join(cand_result['yaku'])
+                    compliance_status = ""
+                    compliance_reason = ""
+                    if cand_result.get('compliance'):
+                        compliance_status, compliance_reason = _parse_compliance(cand_result['compliance'])
                 
-                print(f"候補 {cand_result['candidate_number']}: ✓ BAML抽出成功, ✓ 計算成功 (点数: {cand_result['score']}, 役: {', '.join(cand_result['yaku'])})")
-                if compliance_status:
-                    print(f"  指示適合性: {compliance_status}")
-                    if compliance_reason:
-                        print(f"  理由: {compliance_reason}")
+                    ap(f"候補 {num}: ✓ BAML抽出成功, ✓ 計算成功 (点数: {score}, 役: {yaku_str})")
+                    if compliance_status:
+                        ap(f"  指示適合性: {compliance_status}")
+                        if compliance_reason:
+                            ap(f"  理由: {compliance_reason}")
+            if lines:
+                sys.stdout.write("\n".join(lines) + "\n")
 
         # 結果の統計を表示
         print(f"\n{'='*60}")
@@ -816,17 +1079,9 @@ def repeated_sampling_command(args):
         print(f"総候補数: {total_candidates}")
         
         # 3つの成功率を計算
-        baml_success = sum(1 for cr in candidate_results if cr.get('baml_extracted', False))
-        calculation_success = sum(1 for cr in candidate_results if cr.get('calculation_success', False))
-        compliance_judged = sum(1 for cr in candidate_results if cr.get('compliance_judged', False))
         # 指示適合性が"Yes"の候補数を表示（LLM-as-a-Judgeが実行され、適合と判断した候補）
-        compliant_candidates = [
-            cand for cand in valid_candidates
-            if (cand.get('details', {}).get('compliance_judged', False) and
-                cand.get('details', {}).get('compliance_result') and
-                "Yes" in str(cand.get('details', {}).get('compliance_result', '')))
-        ]
-        compliant_count = len(compliant_candidates)
+        compliant_idx: list[int] = [i for i, cand in enumerate(valid_candidates) if _is_compliant(cand)]
+        compliant_count = len(compliant_idx)
         
         baml_rate = (baml_success / total_candidates * 100) if total_candidates > 0 else 0
         calculation_rate = (calculation_success / baml_success * 100) if baml_success > 0 else 0
@@ -846,14 +1101,14 @@ def repeated_sampling_command(args):
 
         # 有効な候補から指示適合性が高いものを優先的に選択
         if valid_candidates:
-            if compliant_candidates:
+            if compliant_idx:
                 # 指示適合性が"Yes"の候補からランダムに選択
-                selected = random.choice(compliant_candidates)
-                logger.info(f"Selected from {len(compliant_candidates)} compliant candidates")
+                selected = valid_candidates[random.choice(compliant_idx)]
+                logger.info("Selected from %s compliant candidates", compliant_count)
             else:
                 # 適合性が"Yes"の候補がない場合は全てからランダムに選択
                 selected = random.choice(valid_candidates)
-                logger.info(f"No compliant candidates found, selected from all {len(valid_candidates)} candidates")
+                logger.info("No compliant candidates found, selected from all %s candidates", len(valid_candidates))
             
             candidate = selected['candidate']
             details = selected['details']
@@ -877,7 +1132,7 @@ def repeated_sampling_command(args):
                 "instruction": args.instruction if hasattr(args, 'instruction') and args.instruction else "",
                 "total_candidates": total_candidates,
                 "valid_candidates": len(valid_candidates),
-                "compliant_candidates": len(compliant_candidates) if compliant_candidates else 0,
+                "compliant_candidates": compliant_count,
                 "selected_candidate_number": candidate_number,
                 "question": candidate.question,
                 "hand_json": details.get('hand_json', '{}'),  # detailsからhand_jsonを取得
@@ -892,16 +1147,9 @@ def repeated_sampling_command(args):
             }
 
             # 出力パスの決定
-            if args.output:
-                output_path = Path(args.output)
-            else:
-                dist_dir = Path("dist")
-                dist_dir.mkdir(exist_ok=True)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_path = dist_dir / f"repeated_sampling_{timestamp}.json"
+            output_path = Path(args.output) if args.output else _default_output_path("repeated_sampling", timestamp)
 
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
+            _dump(output_path, output_data)
 
             print(f"\n{'='*60}")
             print(f"結果を {output_path} に保存しました")
@@ -912,13 +1160,8 @@ def repeated_sampling_command(args):
             print(f"{'='*60}")
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="麻雀点数計算問題の生成・検証・最適化ツール"
-    )
-    subparsers = parser.add_subparsers(dest="command", help="コマンド")
-
-    # 生成コマンド
+def _build_generate_parser(subparsers):
+    """generateコマンドの引数を定義する"""
     generate_parser = subparsers.add_parser("generate", help="問題を生成する")
     generate_parser.add_argument(
         "-n", "--num", type=int, default=1, help="生成する問題数"
@@ -938,9 +1181,30 @@ def main():
     generate_parser.add_argument(
         "--langfuse", action="store_true", help="Langfuseトレーシングを有効化"
     )
+    generate_parser.add_argument(
+        "-q", "--quiet", action="store_true", help="各問題・各候補の詳細を表示せず、統計のみを表示"
+    )
+    generate_parser.add_argument(
+        "--no-cache", action="store_true",
+        help="検証結果・指示適合性判定のディスクキャッシュ（dist/.cache）を使わない"
+    )
+    generate_parser.add_argument(
+        "--concurrency", type=int, default=16,
+        help="LLM-as-a-Judgeの同時リクエスト数の上限（デフォルト: 16）"
+    )
+    generate_parser.add_argument(
+        "--prompt-cache", action="store_true",
+        help="OpenAIのプロンプトキャッシュのキーを指定し、共通のプロンプト部分をキャッシュさせる"
+    )
+    generate_parser.add_argument(
+        "--batch-api", action="store_true",
+        help=f"指示適合性の判定が{_BATCH_API_THRESHOLD}件以上の場合、OpenAIのBatch APIでまとめて判定する（コスト半額、完了まで最大24時間）"
+    )
     generate_parser.set_defaults(func=generate_command)
 
-    # Repeated Samplingコマンド
+
+def _build_repeated_sampling_parser(subparsers):
+    """repeated-samplingコマンドの引数を定義する"""
     repeated_sampling_parser = subparsers.add_parser(
         "repeated-sampling",
         help="Repeated Samplingで問題を生成する"
@@ -969,15 +1233,68 @@ def main():
     repeated_sampling_parser.add_argument(
         "--langfuse", action="store_true", help="Langfuseトレーシングを有効化"
     )
+    repeated_sampling_parser.add_argument(
+        "-q", "--quiet", action="store_true", help="各問題・各候補の詳細を表示せず、統計のみを表示"
+    )
+    repeated_sampling_parser.add_argument(
+        "--no-cache", action="store_true",
+        help="検証結果・指示適合性判定のディスクキャッシュ（dist/.cache）を使わない"
+    )
+    repeated_sampling_parser.add_argument(
+        "--concurrency", type=int, default=16,
+        help="LLM-as-a-Judgeの同時リクエスト数の上限（デフォルト: 16）"
+    )
+    repeated_sampling_parser.add_argument(
+        "--prompt-cache", action="store_true",
+        help="OpenAIのプロンプトキャッシュのキーを指定し、共通のプロンプト部分をキャッシュさせる"
+    )
+    repeated_sampling_parser.add_argument(
+        "--resume", action="store_true",
+        help="--csv使用時、-oの結果(.results.jsonl)に記録済みの指示をスキップして続きから実行する"
+    )
     repeated_sampling_parser.set_defaults(func=repeated_sampling_command)
 
+
+# サブコマンド名 → 引数定義関数
+SUBCOMMAND_BUILDERS = {
+    "generate": _build_generate_parser,
+    "repeated-sampling": _build_repeated_sampling_parser,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _build_parser(command: str | None = None) -> argparse.ArgumentParser:
+    """引数パーサーを構築する（サブコマンドごとに1度だけ構築して使い回す）"""
+    parser = argparse.ArgumentParser(
+        description="麻雀点数計算問題の生成・検証・最適化ツール"
+    )
+    subparsers = parser.add_subparsers(dest="command", help="コマンド")
+
+    # 指定されたサブコマンドの引数だけを定義する（不明な場合やヘルプ表示時は全て定義する）
+    if command in SUBCOMMAND_BUILDERS:
+        SUBCOMMAND_BUILDERS[command](subparsers)
+    else:
+        for build in SUBCOMMAND_BUILDERS.values():
+            build(subparsers)
+    return parser
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    parser = _build_parser(command if command in SUBCOMMAND_BUILDERS else None)
     args = parser.parse_args()
 
     if args.command is None:
         parser.print_help()
         return
 
-    args.func(args)
+    # -oが無いとデフォルトの出力先は毎回新しいタイムスタンプになり、再開する結果が見つからない
+    if getattr(args, 'resume', False) and not (args.csv and args.output):
+        parser.error("--resume requires --csv and -o/--output pointing to the previous run")
+
+    # サブコマンドはコルーチンとして実装し、イベントループはここで1度だけ作成する
+    # （OpenAIクライアントの接続プールを実行全体で使い回すため）
+    asyncio.run(args.func(args))
 
 
 if __name__ == "__main__":
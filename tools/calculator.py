@@ -1,7 +1,13 @@
-import json
+import asyncio
+import functools
 import logging
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
+from mahjong.constants import EAST, NORTH, SOUTH, WEST
 from mahjong.hand_calculating.hand import HandCalculator
 from mahjong.hand_calculating.hand_config import HandConfig
 from mahjong.meld import Meld
@@ -13,6 +19,39 @@ from tools.exceptions import HandValidationError, ScoreCalculationError
 
 logger = logging.getLogger(__name__)
 
+# 検証・点数計算のロジックを変えたら上げる（検証結果のキャッシュのキーに含め、古い結果を使わないようにする）
+VALIDATION_VERSION = 2
+
+# 34種類の牌の表記（1m-9m, 1p-9p, 1s-9s, 1z-7z）
+_VALID_TILES: frozenset[str] = frozenset(
+    f"{n}{suit}" for suit, count in (("m", 9), ("p", 9), ("s", 9), ("z", 7)) for n in range(1, count + 1)
+)
+
+# 点数計算専用のスレッドプール（イベントループとデフォルトexecutorを塞がない）
+_CALC_POOL = ThreadPoolExecutor(
+    max_workers=os.cpu_count(), thread_name_prefix="mahjong-calc"
+)
+
+# HandCalculatorは計算中に内部状態（config等）を書き換えるため、スレッドごとに1つ作って使い回す
+_CALC_TL = threading.local()
+
+
+def _get_calculator() -> HandCalculator:
+    """現在のスレッド用のHandCalculatorを返す"""
+    calculator = getattr(_CALC_TL, "calculator", None)
+    if calculator is None:
+        calculator = _CALC_TL.calculator = HandCalculator()
+    return calculator
+
+
+# 風の文字列 -> 風の定数（呼び出しごとにimport・dict構築をしない）
+_WIND_MAP: dict[str, int] = {
+    "east": EAST,    # 27
+    "south": SOUTH,  # 28
+    "west": WEST,    # 29
+    "north": NORTH,  # 30
+}
+
 
 def convert_wind_to_constant(wind: str) -> int:
     """
@@ -25,17 +64,10 @@ def convert_wind_to_constant(wind: str) -> int:
         int: 風の定数 (27=東, 28=南, 29=西, 30=北)
         これは34形式のタイルインデックスと同じ値
     """
-    from mahjong.constants import EAST, SOUTH, WEST, NORTH
-
-    wind_map = {
-        "east": EAST,    # 27
-        "south": SOUTH,  # 28
-        "west": WEST,    # 29
-        "north": NORTH,  # 30
-    }
-    if wind not in wind_map:
+    wind_constant = _WIND_MAP.get(wind)
+    if wind_constant is None:
         raise ValueError(f"Invalid wind value: {wind}")
-    return wind_map[wind]
+    return wind_constant
 
 
 def convert_tiles_to_136_array(tiles: List[str]) -> List[int]:
@@ -48,23 +80,27 @@ def convert_tiles_to_136_array(tiles: List[str]) -> List[int]:
     Returns:
         List[int]: 136形式の配列
     """
-    man = ""
-    pin = ""
-    sou = ""
-    honors = ""
-
-    for tile in tiles:
-        if tile.endswith("m"):
-            man += tile[0]
-        elif tile.endswith("p"):
-            pin += tile[0]
-        elif tile.endswith("s"):
-            sou += tile[0]
-        elif tile.endswith("z"):
-            honors += tile[0]
-
-    return TilesConverter.string_to_136_array(
-        man=man, pin=pin, sou=sou, honors=honors
+    return list(_convert_tiles_to_136_cached(tuple(tiles)))
+
+
+@functools.lru_cache(maxsize=4096)
+def _convert_tiles_to_136_cached(tiles_tuple: tuple[str, ...]) -> tuple[int, ...]:
+    """同じ牌の並びは何度も変換されるため、変換結果をtupleでキャッシュする"""
+    # 色ごとに数字を集めて最後に一度だけjoinする
+    buckets = {"m": [], "p": [], "s": [], "z": []}
+
+    for tile in tiles_tuple:
+        bucket = buckets.get(tile[-1:])
+        if bucket is not None:
+            bucket.append(tile[0])
+
+    return tuple(
+        TilesConverter.string_to_136_array(
+            man="".join(buckets["m"]),
+            pin="".join(buckets["p"]),
+            sou="".join(buckets["s"]),
+            honors="".join(buckets["z"]),
+        )
     )
 
 
@@ -87,14 +123,32 @@ def convert_melds_to_mahjong_format(
                 f"メルドはMeldInfo型である必要があります。受け取った型: {type(meld)}"
             )
 
-        tiles = convert_tiles_to_136_array(meld.tiles)
-        meld_type = _detect_meld_type(meld.tiles)
-        # カンの場合はis_openを使用、それ以外は常にTrue
-        is_open = meld.is_open if meld_type == Meld.KAN else True
-        result.append(Meld(meld_type=meld_type, tiles=tiles, opened=is_open))
+        meld_type, tiles, is_open = _meld_params(tuple(meld.tiles), meld.is_open)
+        # Meldはミュータブルなので、キャッシュせず毎回生成する
+        result.append(Meld(meld_type=meld_type, tiles=list(tiles), opened=is_open))
     return result
 
 
+@functools.lru_cache(maxsize=4096)
+def _meld_params(
+    tiles: tuple[str, ...], is_open: bool
+) -> tuple[str, tuple[int, ...], bool]:
+    """同じ鳴きの (鳴きの種類, 136形式の牌, 副露かどうか) をキャッシュする"""
+    meld_type = _detect_meld_type(tiles)
+    # カンの場合はis_openを使用、それ以外は常にTrue
+    opened = is_open if meld_type == Meld.KAN else True
+    return meld_type, _convert_tiles_to_136_cached(tiles), opened
+
+
+# (枚数, 先頭3枚が同じ牌か) -> 鳴きの種類
+_MELD_TYPE = {
+    (4, True): Meld.KAN,
+    (4, False): Meld.KAN,
+    (3, True): Meld.PON,
+    (3, False): Meld.CHI,
+}
+
+
 def _detect_meld_type(tiles: List[str]) -> str:
     """
     牌のリストから鳴きの種類を判定する
@@ -105,15 +159,13 @@ def _detect_meld_type(tiles: List[str]) -> str:
     Returns:
         str: 鳴きの種類 (Meld.CHI, Meld.PON, Meld.KAN)
     """
-    if len(tiles) == 4:
-        # 4枚の場合はカン
-        return Meld.KAN
-    elif len(tiles) == 3:
-        # 同じ牌3枚ならポン
-        return Meld.PON if tiles[0] == tiles[1] == tiles[2] else Meld.CHI
-    else:
+    n = len(tiles)
+    same = n >= 3 and tiles[0] == tiles[1] == tiles[2]
+    meld_type = _MELD_TYPE.get((n, same))
+    if meld_type is None:
         # それ以外はエラー（通常はありえない）
-        raise ValueError(f"Invalid meld size: {len(tiles)}")
+        raise ValueError(f"Invalid meld size: {n}")
+    return meld_type
 
 
 def calculate_score(hand: Hand) -> ScoreResponse:
@@ -128,12 +180,10 @@ def calculate_score(hand: Hand) -> ScoreResponse:
         ScoreResponse: 点数計算結果
     """
     try:
-        calculator = HandCalculator()
+        calculator = _get_calculator()
 
-        # 鳴きの情報を変換
-        mahjong_melds = (
-            convert_melds_to_mahjong_format(hand.melds) if hand.melds else []
-        )
+        # 鳴きの情報を変換（鳴きがNoneの場合は空のタプルとして扱う）
+        mahjong_melds = convert_melds_to_mahjong_format(hand.melds or ())
 
         # 手牌を136形式に変換（全ての牌を含める）
         tiles = convert_tiles_to_136_array(hand.tiles)
@@ -142,12 +192,8 @@ def calculate_score(hand: Hand) -> ScoreResponse:
         win_tile = convert_tiles_to_136_array([hand.win_tile])[0]
 
         # ドラ表示牌を変換
-        dora_indicators = (
-            convert_tiles_to_136_array(hand.dora_indicators)
-            if hand.dora_indicators
-            else []
-        )
-        logger.debug(f"Converted dora indicators: {dora_indicators}")
+        dora_indicators = convert_tiles_to_136_array(hand.dora_indicators or ())
+        logger.debug("Converted dora indicators: %s", dora_indicators)
 
         # 設定を準備
         # player_windとround_windを文字列から整数に変換
@@ -226,21 +272,26 @@ def validate_tiles(tiles: List[str]) -> bool:
     Returns:
         bool: 正しい形式かどうか
     """
-    try:
-        logger.debug(f"Validating tiles: {tiles}")
-        convert_tiles_to_136_array(tiles)
-        return True
-    except Exception as e:
-        logger.error(f"Invalid tile format: {str(e)}")
+    logger.debug("Validating tiles: %s", tiles)
+    if not _is_valid_tiles(tuple(tiles)):
+        logger.error("Invalid tile format: %s", [tile for tile in tiles if tile not in _VALID_TILES])
         return False
+    return True
+
 
+@functools.lru_cache(maxsize=4096)
+def _is_valid_tiles(tiles_tuple: tuple[str, ...]) -> bool:
+    """validate_tilesの判定結果を牌の並びごとにキャッシュする（ログは出さず判定だけを行う）"""
+    # 34種類の表記のいずれかであれば136形式にも変換できる
+    return all(tile in _VALID_TILES for tile in tiles_tuple)
 
-def validate_meld(tiles: List[str], melds: List[MeldInfo]) -> bool:
+
+def validate_meld(tiles_counter: Counter, melds: List[MeldInfo]) -> bool:
     """
     鳴きの形式が正しいかチェックする
 
     Args:
-        tiles: 手牌のリスト
+        tiles_counter: 手牌の牌ごとの枚数（Counter(hand.tiles)）
         melds: MeldInfo形式の鳴きのリスト
 
     Returns:
@@ -254,15 +305,12 @@ def validate_meld(tiles: List[str], melds: List[MeldInfo]) -> bool:
                     f"メルドはMeldInfo型である必要があります。受け取った型: {type(meld)}"
                 )
                 return False
-            convert_tiles_to_136_array(meld.tiles)
+            _convert_tiles_to_136_cached(tuple(meld.tiles))
     except Exception as e:
         logger.error(f"Invalid meld format: {str(e)}")
         return False
 
     # meldsに存在する牌は全てtilesに含まれているべき（枚数も正しくカウント）
-    from collections import Counter
-    tiles_counter = Counter(tiles)
-
     for meld in melds:
         meld_counter = Counter(meld.tiles)
         for tile, count in meld_counter.items():
@@ -277,31 +325,54 @@ def validate_hand(hand: Hand):
     if not hand.tiles:
         raise HandValidationError("Invalid tile format in tiles. tiles is required")
 
+    # 手牌の枚数チェック（O(1)なので牌ごとのチェックより先に行う）
+    # 14枚（カン1つにつき1枚増えるため最大18枚）
+    if len(hand.tiles) < 14:
+        raise HandValidationError("Invalid tile count in hand. tiles is less than 14")
+    if len(hand.tiles) > 18:
+        raise HandValidationError("Invalid tile count in hand. tiles is more than 18")
+
     # 手牌の形式チェック
     if not validate_tiles(hand.tiles):
         raise HandValidationError("Invalid tile format in tiles. tiles is not valid")
 
     # ドラ表示牌の形式チェック
-    if hand.dora_indicators and not validate_tiles(hand.dora_indicators):
+    if not validate_tiles(hand.dora_indicators or ()):
         raise HandValidationError(
             "Invalid tile format in dora indicators. dora_indicators is not valid"
         )
 
+    # 手牌の枚数は一度だけ数え、鳴きと和了牌のチェックで使い回す
+    tiles_counter = Counter(hand.tiles)
+
     # 鳴きの形式チェック
-    if hand.melds and not validate_meld(hand.tiles, hand.melds):
+    if not validate_meld(tiles_counter, hand.melds or ()):
         raise HandValidationError("Invalid meld in hand. melds is not valid")
 
-    # 手牌の枚数チェック
-    if hand.tiles and len(hand.tiles) < 14:
-        raise HandValidationError("Invalid tile count in hand. tiles is less than 14")
-
     # 和了牌の形式チェック
-    if hand.win_tile and hand.win_tile not in hand.tiles:
+    if hand.win_tile and tiles_counter.get(hand.win_tile, 0) == 0:
         raise HandValidationError("Invalid win tile in hand. win_tile is not in tiles")
 
 
 def calculate_score_with_json(json_str: str) -> ScoreResponse:
-    hand_data = json.loads(json_str)
-    hand = Hand(**hand_data)
+    hand = Hand.model_validate_json(json_str)
     validate_hand(hand)
     return calculate_score(hand)
+
+
+async def calculate_score_async(hand: Hand) -> ScoreResponse:
+    """
+    手牌を検証して点数を計算する（専用スレッドプールで実行）
+
+    Args:
+        hand: 手牌
+
+    Returns:
+        ScoreResponse: 点数計算結果
+    """
+
+    def _run() -> ScoreResponse:
+        validate_hand(hand)
+        return calculate_score(hand)
+
+    return await asyncio.get_running_loop().run_in_executor(_CALC_POOL, _run)
@@ -1,14 +1,17 @@
-from typing import Any, Dict, List, Optional
+from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ScoreResponse(BaseModel):
-    han: Optional[int] = Field(None, description="Number of han")
-    fu: Optional[int] = Field(None, description="Number of fu")
-    score: Optional[int] = Field(None, description="Score points")
-    yaku: Optional[List[str]] = Field(None, description="List of yaku")
-    fu_details: Optional[List[Dict[str, Any]]] = Field(
+    # 計算結果は作成後に変更しない
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    han: int | None = Field(None, description="Number of han")
+    fu: int | None = Field(None, description="Number of fu")
+    score: int | None = Field(None, description="Score points")
+    yaku: list[str] | None = Field(None, description="List of yaku")
+    fu_details: list[dict[str, Any]] | None = Field(
         None, description="Fu calculation details"
     )
-    error: Optional[str] = Field(None, description="Error message")
+    error: str | None = Field(None, description="Error message")